@@ -0,0 +1,20 @@
+"""Puts the package on the path for the benchmark scripts, see README.md"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "tests")]
+
+from stubs import use_config_stub  # noqa: E402
+
+use_config_stub()
+
+
+def best(call, number: int = 1, repeat: int = 5) -> float:
+    """Returns the fastest seconds per call over repeat runs of number calls"""
+    return min(timeit.repeat(call, number=number, repeat=repeat)) / number
+
+
+def us(seconds: float) -> str:
+    return f"{seconds * 1e6:10.1f} us"
@@ -0,0 +1,60 @@
+"""One tick of scans run serially against per-bus threads, on simulated device latencies"""
+import _setup
+
+import logging
+import types
+
+from enviroApi.data import SensorData
+from enviroApi.hardware.sensors import Sensors
+from enviroApi.hardware.simulated import SimBackend
+
+# seconds per read, about what the datasheets give: the BME280 reads three values,
+# the PMS5003 waits for its next frame
+LATENCY = {
+    "cpu": 0.001,
+    "bme280": 0.01,
+    "ltr559": 0.05,
+    "sgp30": 0.012,
+    "gas": 0.025,
+    "pms5003": 0.9,
+}
+CONFIG = types.SimpleNamespace(
+    enable_particle_sensor=True,
+    enable_eco2_tvoc=True,
+    enable_oxi_redux_nh3=True,
+    enable_proxy_sensory=True,
+    enable_noise=False,
+)
+
+
+def tick(particle: bool) -> None:
+    sensors = Sensors(
+        types.SimpleNamespace(**{**vars(CONFIG), "enable_particle_sensor": particle}),
+        logging.getLogger(__name__),
+        SensorData=SensorData(),
+        backend=SimBackend(latency=LATENCY),
+        pms_reader=False,
+    )
+    scans = [scan for _, scan, _ in sensors._scans()]
+
+    def serial():
+        for scan in scans:
+            scan()
+
+    try:
+        pms = "with" if particle else "without"
+        print(f"one tick of {len(scans)} scans, {pms} the PMS5003")
+        print(f"  serial  {_setup.best(serial, 1, 3) * 1e3:8.1f} ms")
+        print(f"  per bus {_setup.best(sensors.scan_sensors, 1, 3) * 1e3:8.1f} ms")
+    finally:
+        sensors.close()
+
+
+def main():
+    print(f"seconds per read {LATENCY}")
+    tick(True)
+    tick(False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Gorilla codec compression ratio and throughput on synthetic BME280 and PMS5003 series"""
+import _setup
+
+import numpy as np
+
+from enviroApi.data.codec import (
+    decode_timestamps,
+    decode_values,
+    encode_timestamps,
+    encode_values,
+)
+
+BLOCK = 3600  # one block of the default export, an hour of one second ticks
+START = 1_700_000_000_000_000_000
+
+
+def series(rng: np.random.Generator) -> dict:
+    """Returns one hour of readings, rounded to what each sensor reports"""
+    t = np.arange(BLOCK) / BLOCK
+    walk = np.cumsum(rng.normal(0, 1, BLOCK))
+    return {
+        "temperature (BME280)": np.round(21 + 2 * t + 0.01 * walk, 2),
+        "humidity (BME280)": np.round(45 - 5 * t + 0.05 * walk, 2),
+        "pressure (BME280)": np.round(1013 + 0.002 * walk, 2),
+        "pm2.5 (PMS5003)": np.maximum(0, np.round(8 + 0.3 * walk)),
+        "particles 0.3um (PMS5003)": np.maximum(0, np.round(900 + 20 * walk)),
+    }
+
+
+def report(name: str, size: int, encode: float, decode: float) -> None:
+    """Prints the ratio to raw float64 and the millions of values coded a second"""
+    print(
+        f"  {name:<26}{size:>7}{BLOCK * 8 / size:>6.1f}x"
+        f"{BLOCK / encode / 1e6:>9.2f} M/s{BLOCK / decode / 1e6:>9.2f} M/s"
+    )
+
+
+def main():
+    rng = np.random.default_rng(0)
+    # one second ticks, a few late by up to 20 ms as a real read loop is
+    jitter = np.where(rng.random(BLOCK) < 0.05, rng.integers(0, 20_000_000, BLOCK), 0)
+    timestamps = START + np.arange(BLOCK, dtype=np.int64) * 1_000_000_000 + jitter
+
+    encoded = encode_timestamps(timestamps)
+    assert np.array_equal(decode_timestamps(encoded, BLOCK), timestamps)
+    encode = _setup.best(lambda: encode_timestamps(timestamps))
+    decode = _setup.best(lambda: decode_timestamps(encoded, BLOCK))
+    print(f"{BLOCK} ticks per block, raw 8 bytes a value")
+    print(f"  {'column':<26}{'bytes':>7}{'ratio':>7}{'encode':>13}{'decode':>13}")
+    report("timestamps", len(encoded), encode, decode)
+    total = len(encoded)
+    for name, values in series(rng).items():
+        encoded = encode_values(values)
+        assert np.array_equal(decode_values(encoded, BLOCK), values)
+        encode = _setup.best(lambda: encode_values(values))
+        decode = _setup.best(lambda: decode_values(encoded, BLOCK))
+        report(name, len(encoded), encode, decode)
+        total += len(encoded)
+    raw = BLOCK * 8 * 6
+    print(f"  {'all six streams':<26}{total:>7}{raw / total:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""get_range by bisection against the list scan it replaced, at 600k one second ticks"""
+import _setup
+
+from datetime import datetime
+
+from enviroApi.data import SensorData, Values
+
+TICKS = 600_000
+START = 1_700_000_000_000_000_000
+
+
+def main():
+    data = SensorData(limit_history=TICKS, rollups=())
+    readings = []
+    for i in range(TICKS):
+        ts = START + i * 1_000_000_000
+        value = 20 + (i % 3600) / 3600
+        data.add_data("temperature", value, ts)
+        # the old history: a list of readings stamped with datetimes
+        readings.append(
+            Values(value, datetime.fromtimestamp(ts / 1e9), "C", "temperature")
+        )
+    now = START + TICKS * 1_000_000_000
+    start, end = now - 3 * 3600 * 1_000_000_000, now
+
+    def bisect():
+        return data.get_range("temperature", start, end)
+
+    first, last = datetime.fromtimestamp(start / 1e9), datetime.fromtimestamp(end / 1e9)
+
+    def scan():
+        return [r for r in readings if first <= r.timestamp <= last]
+
+    assert len(bisect()[0]) == len(scan()) == 3 * 3600
+    print(f"{TICKS} ticks, last 3 hours ({3 * 3600} ticks)")
+    print(f"  get_range bisection {_setup.us(_setup.best(bisect, 100))}")
+    print(f"  list scan           {_setup.us(_setup.best(scan, 1, 3))}")
+
+
+if __name__ == "__main__":
+    main()
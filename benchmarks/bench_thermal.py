@@ -0,0 +1,52 @@
+"""CpuThermal's pread against forking a process per reading, as vcgencmd was run"""
+import _setup
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from enviroApi.hardware.thermal import CpuThermal, find_thermal_zone
+
+
+def zone(root: str) -> str:
+    """Returns the cpu thermal zone, or a fake one under root where sysfs has none"""
+    try:
+        return find_thermal_zone()
+    except FileNotFoundError:
+        path = os.path.join(root, "temp")
+        with open(path, "w") as file:
+            file.write("48312\n")
+        return path
+
+
+def main():
+    root = tempfile.mkdtemp()
+    path = zone(root)
+    # vcgencmd is only on a Pi, cat of the same file forks and parses the same way
+    command = (
+        ["vcgencmd", "measure_temp"] if shutil.which("vcgencmd") else ["cat", path]
+    )
+
+    def fork():
+        output = subprocess.Popen(
+            command, stdout=subprocess.PIPE, universal_newlines=True
+        ).communicate()[0]
+        return float(output.strip().replace("temp=", "").replace("'C", ""))
+
+    def reopen():
+        with open(path) as file:
+            return int(file.read()) / 1000
+
+    try:
+        with CpuThermal(path) as thermal:
+            print(f"{path}, fork runs {' '.join(command)}")
+            print(f"  pread    {_setup.us(_setup.best(thermal.read, 10000))}")
+            print(f"  reopen   {_setup.us(_setup.best(reopen, 10000))}")
+            print(f"  fork     {_setup.us(_setup.best(fork, 100, 3))}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
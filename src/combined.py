@@ -15,7 +15,6 @@ except ImportError:
     import ltr559
 
 import logging
-from subprocess import PIPE, Popen
 
 from bme280 import BME280
 from fonts.ttf import RobotoMedium as UserFont
@@ -25,6 +24,8 @@ from pms5003 import ReadTimeoutError as pmsReadTimeoutError
 from pms5003 import SerialTimeoutError
 
 from enviroplus import gas
+from enviroApi.hardware.gas import GasReader
+from enviroApi.hardware.thermal import CpuThermal
 
 logging.basicConfig(
     format="%(asctime)s.%(msecs)03d %(levelname)-8s %(message)s",
@@ -184,11 +185,15 @@ def display_everything():
     st7735.display(img)
 
 
-# Get the temperature of the CPU for compensation
+# One ADC read shared by the gas modes and display_everything, refreshed once a second
+gas_reader = GasReader(gas, max_age=1.0)
+
+# Get the temperature of the CPU for compensation, from sysfs rather than forking vcgencmd
+cpu_thermal = CpuThermal()
+
+
 def get_cpu_temperature():
-    process = Popen(["vcgencmd", "measure_temp"], stdout=PIPE, universal_newlines=True)
-    output, _error = process.communicate()
-    return float(output[output.index("=") + 1 : output.rindex("'")])
+    return cpu_thermal.read()
 
 
 def main():
@@ -252,21 +257,21 @@ def main():
             if mode == 4:
                 # variable = "oxidised"
                 unit = "kO"
-                data = gas.read_all()
+                data = gas_reader.read()
                 data = data.oxidising / 1000
                 display_text(variables[mode], data, unit)
 
             if mode == 5:
                 # variable = "reduced"
                 unit = "kO"
-                data = gas.read_all()
+                data = gas_reader.read()
                 data = data.reducing / 1000
                 display_text(variables[mode], data, unit)
 
             if mode == 6:
                 # variable = "nh3"
                 unit = "kO"
-                data = gas.read_all()
+                data = gas_reader.read()
                 data = data.nh3 / 1000
                 display_text(variables[mode], data, unit)
 
@@ -323,7 +328,7 @@ def main():
                     raw_data = 1
                 save_data(3, raw_data)
                 display_everything()
-                gas_data = gas.read_all()
+                gas_data = gas_reader.read()
                 save_data(4, gas_data.oxidising / 1000)
                 save_data(5, gas_data.reducing / 1000)
                 save_data(6, gas_data.nh3 / 1000)
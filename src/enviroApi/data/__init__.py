@@ -1,62 +1,451 @@
 from enviroApi.config import Variable_Units
+from enviroApi.data.buffer import ColumnStore
+from enviroApi.data.codec import GorillaWriter
+from enviroApi.data.feed import Subscription
+from enviroApi.data.gaps import GapIndex
+from enviroApi.data.nowcast import (
+    PM10_BREAKPOINTS,
+    PM25_BREAKPOINTS,
+    NowCast,
+    TimeWeightedAverage,
+)
+from enviroApi.data.resample import resample, time_grid
+from enviroApi.data.rollup import Rollup
+from enviroApi.data.segments import SegmentStore
+from enviroApi.data.sketch import SketchSeries
+from enviroApi.data.stats import RollingStats, Stats
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
+from numbers import Integral
+from typing import Union
+import numpy as np
+import time
 
 
-@dataclass
-class Values(frozen=True):
-    """Dataclass to hold values of sensor readings
+class Values:
+    """Class to hold values of sensor readings
     init:
         value (float): value of sensor reading
-        timestamp (datetime): timestamp of when the value of read
+        timestamp (int): timestamp of when the value of read, in ns since the epoch
         unit (str): Unit for the balues
+        name (str): name of the variable
+    Details:
+        Readings are mutable and use __slots__ so Sensors can update value and
+        timestamp in place on every scan without allocating a new object.
     Returns:
         None
     """
 
-    value: float
-    timestamp: datetime
-    unit: str
-    name: str
+    __slots__ = ("value", "timestamp", "unit", "name")
+
+    def __init__(self, value: float, timestamp: int, unit: str, name: str):
+        self.value = value
+        self.timestamp = timestamp
+        self.unit = unit
+        self.name = name
+
+    def __repr__(self) -> str:
+        return (
+            f"Values(value={self.value!r}, timestamp={self.timestamp!r}, "
+            f"unit={self.unit!r}, name={self.name!r})"
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Values):
+            return NotImplemented
+        return (self.value, self.timestamp, self.unit, self.name) == (
+            other.value,
+            other.timestamp,
+            other.unit,
+            other.name,
+        )
+
+    def to_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp / 1_000_000_000)
+
+
+@dataclass
+class Snapshot:
+    """Dataclass to hold the latest tick of every variable, read consistently
+    init:
+        timestamp (int): timestamp of the tick, in ns since the epoch, 0 if there is no history
+        values (dict): {variable: value}, NaN for variables not read in the tick
+        seq (int): write sequence number the snapshot was taken at
+    Returns:
+        None
+    """
+
+    timestamp: int
+    values: dict
+    seq: int
+
+
+def to_ns(timestamp: Union[datetime, int]) -> int:
+    """Converts a datetime to integer nanoseconds since the epoch, ints are taken as ns already"""
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp()) * 1_000_000_000 + timestamp.microsecond * 1000
+    if isinstance(timestamp, Integral):
+        # numpy ints, e.g. an element of a timestamp array get_range returned
+        return int(timestamp)
+    raise TypeError(f"expected a datetime or int ns, got {type(timestamp).__name__}")
+
+
+def as_ns(when: Union[datetime, timedelta, int], now: int = None) -> int:
+    """Converts a point in time to integer nanoseconds since the epoch
+
+    Args:
+        when (datetime, timedelta, int): a datetime, a timedelta before now, or ns
+            since the epoch as to_ns takes it. Floats are refused rather than guessed at.
+        now (int, optional): what a timedelta is relative to, in ns. Defaults to time.time_ns().
+
+    Returns:
+        int: ns since the epoch
+    """
+    if isinstance(when, datetime):
+        return to_ns(when)
+    if isinstance(when, timedelta):
+        now = time.time_ns() if now is None else now
+        return now - when // timedelta(microseconds=1) * 1000
+    return to_ns(when)
 
 
 class SensorData:
-    """Class to hold data from sensors as well as historical data"""
+    """Class to hold data from sensors as well as historical data
+
+    init:
+        limit_history (int): number of ticks of raw history kept
+        rollups (tuple): (interval, buckets) pairs, one rollup tier per pair, with the bucket
+            width in seconds and the number of buckets kept
+        stats_window (float): seconds of readings covered by the rolling statistics
+        stats_count (int): most readings covered by the rolling statistics, None for no limit
+        archive_path (str): directory to spill ticks to once limit_history is reached,
+            None to overwrite them instead
+        chunk (int): number of ticks spilled to the archive at a time
+        segment_rows (int): number of ticks in each archive segment file
+        quantile_sensors (tuple): variables to keep quantile sketches for, None for
+            pm1, pm2.5, pm10, noise and voc
+        quantile_hours (int): number of hourly quantile sketches kept per variable
+        gap_after (float): seconds without a reading after which a sensor counts as out,
+            see set_gap_after for sensors read less often
+        var_untits (Variable_Units): the variables and units tracked
+    Details:
+        History is held in a preallocated ColumnStore with one timestamp column shared
+        by every variable and one float64 column per variable in var_untits.variables.
+        A tick is one row, a variable that was not read in that tick is NaN. Once the
+        store is full the oldest rows are overwritten, so memory use is fixed at
+        limit_history * (8 + 8 * number of variables) bytes.
+        Each reading is also folded into every rollup tier, which keeps min/max/sum/count
+        per bucket. The defaults keep 6 hours of raw 1 Hz ticks, a week of minutes and a
+        year of hours.
+        Rolling mean, variance, min and max of every variable are kept up to date
+        as readings arrive, read them with get_stats rather than scanning history.
+        With an archive_path, the oldest chunk of ticks is written to a SegmentStore
+        instead of being overwritten. get_logs and get_range read across the archive
+        and the in-memory ticks as one history, indexes counting from the oldest archived tick.
+        The quantile_sensors also feed an hourly KLL sketch, so get_percentiles answers
+        day and week percentiles from bounded memory without sorting the samples.
+        One thread may write (add_data, add_row, set_attributes) while others read. Writes
+        bump a sequence number before and after, and readers retry if a write overlapped
+        them (a seqlock), so the writer never waits on a reader and readers take no lock.
+        Readers on other threads should use snapshot, or copy=True on get_logs/get_range,
+        since views into the history are overwritten as it wraps.
+        Consumers can subscribe instead of polling, each write is published to every
+        subscription as a Snapshot of the variables it wrote.
+        pm1, pm2.5 and pm10 feed hourly buckets for a 12 hour NowCast and a 24 hour
+        average, read with get_nowcast, get_aqi and get_average.
+        Outages, a NaN reading, mark_outage or more than gap_after seconds between
+        readings, go into a GapIndex per variable. get_gaps, get_spans and get_coverage
+        answer from it by bisection, and resample jumps over them instead of scanning.
+    """
 
     def __init__(
-        limit_history: int = 604800,
-        history_check: int = 10000,
-        chunk: int = 86400,
+        self,
+        limit_history: int = 21600,
+        rollups: tuple = ((60, 10080), (3600, 8760)),
+        stats_window: float = 600,
+        stats_count: int = None,
+        archive_path: str = None,
+        chunk: int = 3600,
+        segment_rows: int = 86400,
+        quantile_sensors: tuple = None,
+        quantile_hours: int = 192,
+        gap_after: float = 60,
         var_untits: Variable_Units = Variable_Units(),
     ):
         self.var_units = var_untits
-        self.history_check = history_check
         self.limit_history = limit_history
-        self.chunk = chunk
         self.data = {}
-        self.data_log = {}
+        self._seq = 0
+        self._subscriptions = ()
+        self.history = ColumnStore(self.var_units.variables, limit_history)
+        self._row = np.full(len(self.history.columns), np.nan)
+        self.rollups = sorted(
+            (
+                Rollup(self.var_units.variables, interval, buckets)
+                for interval, buckets in rollups
+            ),
+            key=lambda rollup: rollup.interval,
+        )
+        self.stats = {
+            K: RollingStats(count=stats_count, window=stats_window)
+            for K in self.var_units.variables
+        }
+        if quantile_sensors is None:
+            quantile_sensors = (
+                self.var_units.pm1,
+                self.var_units.pm25,
+                self.var_units.pm10,
+                self.var_units.noise,
+                self.var_units.voc,
+            )
+        self.sketches = {
+            K: SketchSeries(interval=3600, buckets=quantile_hours)
+            for K in quantile_sensors
+        }
+        self.nowcasts = {
+            self.var_units.pm1: NowCast(),
+            self.var_units.pm25: NowCast(breakpoints=PM25_BREAKPOINTS),
+            self.var_units.pm10: NowCast(breakpoints=PM10_BREAKPOINTS),
+        }
+        self.averages = {K: TimeWeightedAverage() for K in self.nowcasts}
+        self.gap_after = gap_after
+        self.gaps = {
+            K: GapIndex(max_interval=gap_after) for K in self.var_units.variables
+        }
+        self.chunk = max(1, min(chunk, limit_history))
+        self.archive = (
+            None
+            if archive_path is None
+            else SegmentStore(archive_path, self.var_units.variables, segment_rows)
+        )
 
     def set_attributes(self):
-        for K in self.var_units.variables:
-            # setattr(self, K, 0)
-            # setattr(self, K + '_hist', [])
-            self.data[K] = Values(0.00, self.ts(), "XX", "No data available")
-            self.history[K] = []
+        with self._writing():
+            for K in self.var_units.variables:
+                # setattr(self, K, 0)
+                # setattr(self, K + '_hist', [])
+                # named and united already, _set_data only updates value and timestamp
+                self.data[K] = Values(0.00, self.ts(), self.var_units.Dict[K], K)
+            self.history.clear()
+            for rollup in self.rollups:
+                rollup.clear()
+            for stats in self.stats.values():
+                stats.clear()
+            for sketch in self.sketches.values():
+                sketch.clear()
+            for hourly in (*self.nowcasts.values(), *self.averages.values()):
+                hourly.clear()
+            for gaps in self.gaps.values():
+                gaps.clear()
+
+    @contextmanager
+    def _writing(self):
+        """Marks a write, the sequence number is odd while it is in progress"""
+        self._seq += 1
+        try:
+            yield
+        finally:
+            self._seq += 1
+
+    def _consistent(self, read):
+        """Calls read until no write overlapped it and returns its result
 
-    def ts(self):
-        return datetime.now()
+        Args:
+            read (callable): reads from the store and returns copies, not views
+        """
+        while True:
+            seq = self._seq
+            if not seq & 1:
+                try:
+                    result = read()
+                except (RuntimeError, IndexError, ValueError):
+                    # a structure changed under the reader, only retry if a write did it
+                    if self._seq == seq:
+                        raise
+                else:
+                    if self._seq == seq:
+                        return result
+            time.sleep(0)
 
-    def add_data(self, sensor, value, timestamp: datetime = self.ts()):
+    def ts(self) -> int:
+        return time.time_ns()
+
+    def add_data(self, sensor, value, timestamp: Union[datetime, int] = None):
         # setattr(self, sensor, value)
-        self.data[sensor] = Values(
-            value, timestamp, self.var_units.Dict[sensor], sensor
+        ns = self.ts() if timestamp is None else to_ns(timestamp)
+        with self._writing():
+            self._spill()
+            self.history.append_value(sensor, value, ns)
+            for rollup in self.rollups:
+                rollup.add_value(sensor, value, ns)
+            self._fold(sensor, value, ns)
+        if self._subscriptions:
+            self._publish(Snapshot(ns, {sensor: value}, self._seq))
+
+    def _fold(self, sensor: str, value: float, ns: int) -> None:
+        """Folds one reading into the latest data, stats, sketches, nowcasts and gaps"""
+        self._set_data(sensor, value, ns)
+        self.stats[sensor].add(value, ns)
+        if sensor in self.sketches:
+            self.sketches[sensor].add(value, ns)
+        if sensor in self.nowcasts:
+            self.nowcasts[sensor].add(value, ns)
+            self.averages[sensor].add(value, ns)
+        if value == value:  # not NaN
+            self.gaps[sensor].observe(ns)
+        else:
+            self.gaps[sensor].mark_down(ns)
+
+    def _set_data(self, sensor: str, value: float, timestamp: int) -> None:
+        """Updates the latest reading of a sensor in place"""
+        reading = self.data.get(sensor)
+        if reading is None:
+            self.data[sensor] = Values(
+                value, timestamp, self.var_units.Dict[sensor], sensor
+            )
+        else:
+            reading.value = value
+            reading.timestamp = timestamp
+
+    def add_row(self, readings: list, timestamp: Union[datetime, int] = None) -> None:
+        """Adds one tick of readings, e.g. the output of Sensors.read_sensors
+
+        Args:
+            readings (list): Values to add, readings for sensors that are not
+                one of the tracked variables (like the cpu temperature) are skipped
+            timestamp (datetime, int, optional): timestamp shared by the whole row, ints
+                are ns since the epoch. Defaults to now.
+        """
+        ns = self.ts() if timestamp is None else to_ns(timestamp)
+        with self._writing():
+            self._row.fill(np.nan)
+            for reading in readings:
+                column = self.history.index.get(reading.name)
+                if column is not None:
+                    self._row[column] = reading.value
+                    self._fold(reading.name, reading.value, ns)
+            self._spill()
+            self.history.append(self._row, ns)
+            for rollup in self.rollups:
+                rollup.add(self._row, ns)
+        if self._subscriptions:
+            self._publish(
+                Snapshot(
+                    ns,
+                    {
+                        name: value
+                        for name, value in zip(self.history.columns, self._row.tolist())
+                        if value == value  # not NaN
+                    },
+                    self._seq,
+                )
+            )
+
+    def set_gap_after(self, sensor: str, seconds: float) -> None:
+        """Sets the seconds without a reading after which one sensor counts as out
+
+        Details:
+            Give a sensor read every few minutes more than its period, e.g.
+            Sensors.schedule sets twice the slowest period of each group, or every
+            reading would start an outage.
+        """
+        with self._writing():
+            self.gaps[sensor].max_interval = seconds
+
+    def mark_outage(self, sensor: str, timestamp: Union[datetime, int] = None) -> None:
+        """Records that a sensor failed to read, e.g. a PMS5003 timeout, until its next reading"""
+        ns = self.ts() if timestamp is None else to_ns(timestamp)
+        with self._writing():
+            self.gaps[sensor].mark_down(ns)
+
+    def subscribe(
+        self, callback=None, maxsize: int = 64, policy: str = "drop_oldest"
+    ) -> Subscription:
+        """Subscribes to writes, instead of polling for them
+
+        Args:
+            callback (callable, optional): called with each update on a thread of the
+                subscription's own, None to read updates with get or async for.
+                Defaults to None.
+            maxsize (int, optional): most updates queued. Defaults to 64.
+            policy (str, optional): "drop_oldest" or "coalesce", what to do when the
+                queue is full, see Subscription. Defaults to "drop_oldest".
+
+        Return
+            Subscription: close it to unsubscribe
+        """
+        subscription = Subscription(maxsize, policy, callback, self._unsubscribe)
+        self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions = tuple(
+            s for s in self._subscriptions if s is not subscription
+        )
+
+    def _publish(self, update: Snapshot) -> None:
+        for subscription in self._subscriptions:
+            subscription.publish(update)
+
+    def _spill(self) -> None:
+        """Moves the oldest chunk of ticks to the archive when the history is full"""
+        if self.archive is None or len(self.history) < self.history.capacity:
+            return
+        self.archive.append(
+            self.history.timestamps(0, self.chunk), self.history.values(0, self.chunk)
         )
-        self.history[sensor] = self.history.get(sensor, []) + [self.data[sensor]]
-        self._check_history(sensor)
+        self.history.drop(self.chunk)
 
-    def _check_history(self, sensor: str):
-        if len(self.history[sensor]) > self.history_check:
-            self.history[sensor] = self.history[sensor][self.chunk :]
+    def _length(self) -> int:
+        """Number of ticks held, archived and in memory"""
+        return len(self.history) + (0 if self.archive is None else len(self.archive))
+
+    def _slice(self, sensor: str, start: int = 0, end: int = None) -> tuple:
+        """Returns (timestamps, values) of a sensor between two tick indexes, across the archive"""
+        if self.archive is None:
+            return self.history.column_slice(sensor, start, end)
+        start, end, _ = slice(start, end).indices(self._length())
+        archived = len(self.archive)
+        if end <= archived:
+            return self.archive.column_slice(sensor, start, end)
+        if start >= archived:
+            return self.history.column_slice(sensor, start - archived, end - archived)
+        old_timestamps, old_values = self.archive.column_slice(sensor, start)
+        timestamps, values = self.history.column_slice(sensor, 0, end - archived)
+        return (
+            np.concatenate((old_timestamps, timestamps)),
+            np.concatenate((old_values, values)),
+        )
+
+    def _timestamps(self, start: int = 0, end: int = None) -> np.ndarray:
+        """Returns the timestamps of the ticks between two tick indexes, across the archive"""
+        if self.archive is None:
+            return self.history.timestamps(start, end)
+        start, end, _ = slice(start, end).indices(self._length())
+        archived = len(self.archive)
+        if end <= archived:
+            return self.archive.timestamps(start, end)
+        if start >= archived:
+            return self.history.timestamps(start - archived, end - archived)
+        return np.concatenate(
+            (self.archive.timestamps(start), self.history.timestamps(0, end - archived))
+        )
+
+    def _time_range(self, start: int = None, end: int = None) -> tuple:
+        """Returns the tick indexes bounding a time range, across the archive"""
+        first, last = self.history.time_range(start, end)
+        if self.archive is None:
+            return first, last
+        archived = len(self.archive)
+        return (
+            0 if start is None else self.archive.search(start) + first,
+            archived + last
+            if end is None
+            else self.archive.search(end, "right") + last,
+        )
 
     # def add_data(self, data):
     #    self.add_data(getattr(self.var_units, ))
@@ -95,7 +484,137 @@ class SensorData:
         self.add_data(self.var_units.noise, data)
 
     def get_data(self, sensor: str):
-        return self.data.get(sensor, Values(0.00, self.ts(), "XX", "No data available"))
+        def read():
+            reading = self.data.get(sensor)
+            if reading is None:
+                return Values(0.00, self.ts(), "XX", "No data available")
+            return Values(reading.value, reading.timestamp, reading.unit, reading.name)
+
+        return self._consistent(read)
+
+    def snapshot(self) -> Snapshot:
+        """Returns the latest tick of every variable, consistent across variables"""
+
+        def read():
+            seq = self._seq
+            latest = self.history.latest()
+            if latest is None:
+                return Snapshot(0, {}, seq)
+            timestamp, row = latest
+            return Snapshot(
+                timestamp, dict(zip(self.history.columns, row.tolist())), seq
+            )
+
+        return self._consistent(read)
+
+    def get_stats(self, sensor: str, now: Union[datetime, int] = None) -> Stats:
+        """Returns the rolling count, mean, variance, min and max of a sensor
+
+        Args:
+            sensor (str): sensor
+            now (datetime, int, optional): time the window ends at, readings older than
+                stats_window before it are left out. Defaults to None (now).
+        """
+        now = self.ts() if now is None else to_ns(now)
+        return self._consistent(lambda: self.stats[sensor].snapshot(now))
+
+    def get_nowcast(self, sensor: str) -> float:
+        """Returns the 12 hour NowCast concentration of pm1, pm2.5 or pm10, None if too few recent hours have readings"""
+        now = self.ts()
+        return self._consistent(lambda: self.nowcasts[sensor].value(now))
+
+    def get_aqi(self, sensor: str) -> int:
+        """Returns the AQI of the NowCast of pm2.5 or pm10, None if there is no NowCast"""
+        now = self.ts()
+        return self._consistent(lambda: self.nowcasts[sensor].index(now))
+
+    def get_average(self, sensor: str) -> float:
+        """Returns the 24 hour average of pm1, pm2.5 or pm10, None if under 75% of the hours have readings"""
+        now = self.ts()
+        return self._consistent(lambda: self.averages[sensor].value(now))
+
+    def get_gaps(
+        self,
+        sensor: str,
+        start: Union[datetime, timedelta, int] = None,
+        end: Union[datetime, timedelta, int] = None,
+    ) -> list:
+        """Returns the outages of a sensor overlapping a time range, see get_range for start and end
+
+        Return
+            list: (start, end) tuples in ns since the epoch, oldest first, clipped to the range,
+                an outage still in progress ends now
+        """
+        now = self.ts()
+        start = None if start is None else as_ns(start, now)
+        end = None if end is None else as_ns(end, now)
+        return self._consistent(lambda: self.gaps[sensor].gaps(start, end, now))
+
+    def get_spans(
+        self,
+        sensor: str,
+        start: Union[datetime, timedelta, int] = None,
+        end: Union[datetime, timedelta, int] = None,
+    ) -> list:
+        """Returns the parts of a time range in which a sensor was up, the complement of get_gaps
+
+        Details:
+            Pass each span to get_range to read only the stretches with data.
+        """
+        now = self.ts()
+        start = None if start is None else as_ns(start, now)
+        end = None if end is None else as_ns(end, now)
+        return self._consistent(lambda: self.gaps[sensor].spans(start, end, now))
+
+    def get_coverage(
+        self,
+        sensor: str,
+        start: Union[datetime, timedelta, int] = None,
+        end: Union[datetime, timedelta, int] = None,
+    ) -> float:
+        """Returns the fraction of a time range in which a sensor was up, None for an empty range
+
+        Details:
+            start defaults to the first reading of the sensor and end to now,
+            e.g. get_coverage("pm2.5", timedelta(hours=24)) is the uptime over the last day.
+        """
+        now = self.ts()
+        start = None if start is None else as_ns(start, now)
+        end = None if end is None else as_ns(end, now)
+        return self._consistent(lambda: self.gaps[sensor].coverage(start, end, now))
+
+    def get_percentiles(
+        self,
+        sensor: str,
+        percentiles: tuple = (50, 95, 99),
+        start: Union[datetime, timedelta, int] = timedelta(hours=24),
+        end: Union[datetime, timedelta, int] = None,
+    ) -> dict:
+        """Returns estimated percentiles of a sensor over a window
+
+        Args:
+            sensor (str): sensor, one of the quantile_sensors
+            percentiles (tuple, optional): percentiles wanted, 0 to 100. Defaults to (50, 95, 99).
+            start (datetime, timedelta, int, optional): start of the window, see
+                get_range. Defaults to timedelta(hours=24).
+            end (datetime, timedelta, int, optional): end of the window. Defaults to None (now).
+
+        Details:
+            Windows are rounded out to whole hours, e.g. the last 24 hours include all of
+            the hour the window starts in, a calendar day from midnight to midnight is exact,
+            an end on the hour leaving out the hour it starts. Estimates are within about 1% of rank.
+
+        Return
+            dict: {percentile: value}, values are NaN if there are no samples in the window
+        """
+        now = self.ts()
+        sketch = self._consistent(
+            lambda: self.sketches[sensor].sketch(
+                None if start is None else as_ns(start, now),
+                None if end is None else as_ns(end, now),
+            )
+        )
+        return dict(zip(percentiles, sketch.quantiles([p / 100 for p in percentiles])))
 
     def get_logs(
         self,
@@ -103,34 +622,270 @@ class SensorData:
         history_length: int = 5,
         start_index: int = None,
         end_index: int = None,
-    ) -> list:
-        """_summary_
+        copy: bool = False,
+    ) -> tuple:
+        """Returns history for a sensor
 
         Args:
             sensor (str): sensor
             history_length (int, optional): amount of data to return. Defaults to 5.
-            start_index (int, optional): index to start history at. Defaults to 0.
-            end_index (int, optional): index to end history at. Defaults to -1.
+            start_index (int, optional): index to start history at. Defaults to None.
+            end_index (int, optional): index to end history at. Defaults to None.
+            copy (bool, optional): return copies read consistently with the writer, for
+                readers on other threads. Defaults to False.
 
         Details:
             returns a given amount of history.
                 If start_index and end_index are populated, then it will return data between the
-                those index (inclusive), if the index are greater then the list, it will return
-                as much data as possible. if end_index = -1, then it will return all the way to the end of the list
+                those index (inclusive), if the index are greater then the history, it will return
+                as much data as possible. if end_index = -1, then it will return all the way to the end of the history
                 If start_index or end_index is not populated, then it will return N, N-1, N-2....N-history_length - 1 of data.
+            The arrays are views into the history buffer when the range does not wrap around the
+            end of the buffer, so copy them if they need to outlive the next add_data.
+            Indexes count ticks, values are NaN for ticks in which the sensor was not read.
+
+        Return
+            tuple: (timestamps, values) numpy arrays, timestamps in ns since the epoch, oldest first
+        """
+
+        def read():
+            if start_index is not None and end_index is not None:
+                if end_index == -1:
+                    return self._slice(sensor, start_index)
+                if start_index > end_index:
+                    return self._slice(sensor, end_index, start_index + 1)
+                return self._slice(sensor, start_index, end_index + 1)
+            return self._slice(sensor, max(self._length() - history_length, 0))
+
+        if copy:
+            return self._consistent(lambda: tuple(a.copy() for a in read()))
+        return read()
+
+    def get_range(
+        self,
+        sensor: str,
+        start: Union[datetime, timedelta, int] = None,
+        end: Union[datetime, timedelta, int] = None,
+        resolution: Union[timedelta, int, float] = None,
+        stat: str = "mean",
+        copy: bool = False,
+    ) -> tuple:
+        """Returns the history of a sensor between two points in time
+
+        Args:
+            sensor (str): sensor
+            start (datetime, timedelta, int, optional): start of the range (inclusive),
+                a timedelta is taken as that long before now and an int as ns since the
+                epoch, like the timestamps returned. Defaults to None (the oldest tick held).
+            end (datetime, timedelta, int, optional): end of the range (inclusive).
+                Defaults to None (the newest tick).
+            resolution (timedelta, int, float, optional): coarsest spacing wanted between
+                points, in seconds. Defaults to None (raw ticks).
+            stat (str, optional): statistic to return from a rollup tier, one of mean,
+                min, max, sum or count. Ignored for raw ticks. Defaults to "mean".
+            copy (bool, optional): return copies read consistently with the writer, for
+                readers on other threads. Defaults to False.
+
+        Details:
+            The range is found by bisection over the tick timestamps, so the lookup is O(log n)
+            and the result is a contiguous slice, a view unless it wraps around the buffer.
+            e.g. get_range("pm2.5", timedelta(hours=3)) gives the last three hours.
+            With a resolution, the coarsest rollup tier whose buckets are no wider than it is
+            used, e.g. resolution=timedelta(minutes=5) reads the 1 minute tier.
+
+        Return
+            tuple: (timestamps, values) numpy arrays, timestamps in ns since the epoch, oldest first
+        """
+        now = self.ts()
+        start = None if start is None else as_ns(start, now)
+        end = None if end is None else as_ns(end, now)
+        rollup = self.get_rollup(resolution)
+
+        def read():
+            if rollup is None:
+                return self._slice(sensor, *self._time_range(start, end))
+            return rollup.column_slice(sensor, *rollup.time_range(start, end), stat)
+
+        if copy:
+            return self._consistent(lambda: tuple(a.copy() for a in read()))
+        return read()
+
+    def resample(
+        self,
+        sensors: list,
+        interval: Union[timedelta, int, float],
+        start: Union[datetime, timedelta, int] = None,
+        end: Union[datetime, timedelta, int] = None,
+        method: str = "ffill",
+        tolerance: Union[timedelta, int, float] = None,
+    ) -> tuple:
+        """Aligns several sensors to a common time grid, e.g. for compensation math
+
+        Args:
+            sensors (list): sensors, one column each
+            interval (timedelta, int, float): spacing of the grid, in seconds
+            start (datetime, timedelta, int, optional): start of the grid, see
+                get_range. Defaults to None (the oldest tick held).
+            end (datetime, timedelta, int, optional): end of the grid. Defaults to None (the newest tick).
+            method (str, optional): "ffill" carries the last reading forward, "linear"
+                interpolates between readings. Defaults to "ffill".
+            tolerance (timedelta, int, float, optional): seconds a reading stays valid for,
+                see enviroApi.data.resample. Defaults to None (no limit).
+
+        Details:
+            Sensors read at different cadences leave NaN in each other's ticks, each sensor
+            is aligned on its own readings with searchsorted/interp, so the whole matrix is
+            built in a handful of vectorized passes.
+            e.g. resample(["temperature", "humidity", "pressure"], 60, timedelta(hours=1))
 
         Return
-            List
+            tuple: (grid, matrix), grid timestamps in ns and a (len(grid), len(sensors)) array
         """
-        if start_index and end_index:
-            if start_index > end_index:
-                start_index, end_index = end_index, start_index
-            data_len = len(self.history[sensor])
-            if data_len > end_index - start_index:
-                return self.history[sensor]
-            elif end_index > data_len:
-                return self.history[sensor][start_index:]
+        if isinstance(interval, timedelta):
+            interval = interval.total_seconds()
+        if isinstance(tolerance, timedelta):
+            tolerance = tolerance.total_seconds()
+        now = self.ts()
+        start = None if start is None else as_ns(start, now)
+        end = None if end is None else as_ns(end, now)
+
+        def read():
+            first, last = self._time_range(start, end)
+            if first >= last:
+                return None, []
+            bounds = (
+                int(self._timestamps(first, first + 1)[0]),
+                int(self._timestamps(last - 1, last)[0]),
+            )
+            series = []
+            for K in sensors:
+                # take in the readings either side of the range, so the ends of the grid
+                # have something to carry forward or interpolate from
+                lo = self._find_reading(K, first - 1, -1)
+                hi = self._find_reading(K, last - 1, 1) if method == "linear" else None
+                timestamps, values = self._slice(
+                    K,
+                    first if lo is None else min(lo, first),
+                    last if hi is None else max(hi + 1, last),
+                )
+                series.append((timestamps.copy(), values.copy()))
+            return bounds, series
+
+        bounds, series = self._consistent(read)
+        if bounds is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(sensors)))
+        grid = time_grid(
+            bounds[0] if start is None else start,
+            bounds[1] if end is None else end,
+            int(interval * 1_000_000_000),
+        )
+        matrix = np.empty((len(grid), len(sensors)))
+        for i, (timestamps, values) in enumerate(series):
+            matrix[:, i] = resample(
+                timestamps,
+                values,
+                grid,
+                method,
+                None if tolerance is None else int(tolerance * 1_000_000_000),
+            )
+        return grid, matrix
+
+    def _find_reading(self, sensor: str, index: int, step: int) -> int:
+        """Finds the nearest tick at or past index, searching backwards (step -1) or
+        forwards (step 1), in which sensor was read. Returns None if there is none
+        """
+        length = self._length()
+        window = 64
+        while True:
+            if 0 <= index < length:
+                # jump over a recorded outage rather than scanning the ticks in it
+                gap = self.gaps[sensor].containing(
+                    int(self._timestamps(index, index + 1)[0])
+                )
+                if gap is not None:
+                    index = (
+                        self._time_range(None, gap[0])[1] - 1
+                        if step < 0
+                        else self._time_range(gap[1], None)[0]
+                    )
+            if step < 0:
+                lo, hi = max(index - window + 1, 0), index + 1
             else:
-                return self.history.get(sensor)[start_index:end_index]
+                lo, hi = index, min(index + window, length)
+            if lo >= hi:
+                return None
+            read = np.flatnonzero(~np.isnan(self._slice(sensor, lo, hi)[1]))
+            if len(read):
+                return lo + int(read[-1] if step < 0 else read[0])
+            if (step < 0 and lo == 0) or (step > 0 and hi == length):
+                return None
+            window *= 2
+
+    def export(
+        self,
+        path: str,
+        start: Union[datetime, timedelta, int] = None,
+        end: Union[datetime, timedelta, int] = None,
+        block_rows: int = 3600,
+    ) -> int:
+        """Writes history to a compressed archive, for keeping or uploading
+
+        Args:
+            path (str): archive file, appended to if it exists
+            start (datetime, timedelta, int, optional): start of the range (inclusive),
+                see get_range. Defaults to None (the oldest tick held).
+            end (datetime, timedelta, int, optional): end of the range (inclusive).
+                Defaults to None (the newest tick, archived or in memory, when the export starts).
+            block_rows (int, optional): ticks per block, the unit a reader seeks to. Defaults to 3600.
+
+        Details:
+            Timestamps are stored as delta of deltas and values XORed with the previous value,
+            see enviroApi.data.codec. Read the archive back with GorillaReader.
+            Each block is copied out consistently with the writer, so a live store can be
+            exported from another thread, and the next block is found by timestamp, so ticks
+            the writer adds or drops in between do not shift it.
+
+        Return
+            int: number of ticks written
+        """
+        now = self.ts()
+        start = None if start is None else as_ns(start, now)
+        # fixed up front, so a busy writer cannot keep the export going
+        if end is None:
+            newest = self._consistent(lambda: self._timestamps(-1).tolist())
+            end = newest[0] if newest else now
+        else:
+            end = as_ns(end, now)
+
+        def read():
+            first, last = self._time_range(start, end)
+            if first >= last:
+                return None
+            last = min(first + block_rows, last)
+            return self._timestamps(first, last).copy(), np.vstack(
+                [self._slice(column, first, last)[1] for column in self.history.columns]
+            )
+
+        ticks = 0
+        with GorillaWriter(path, self.history.columns) as writer:
+            while True:
+                block = self._consistent(read)
+                if block is None:
+                    break
+                timestamps, matrix = block
+                writer.write_block(timestamps, matrix)
+                ticks += len(timestamps)
+                start = int(timestamps[-1]) + 1
+        return ticks
 
-        return self.history[sensor][-1 * history_length :]
+    def get_rollup(self, resolution: Union[timedelta, int, float] = None) -> Rollup:
+        """Returns the coarsest rollup tier no coarser than resolution, or None for raw ticks"""
+        if resolution is None:
+            return None
+        if isinstance(resolution, timedelta):
+            resolution = resolution.total_seconds()
+        chosen = None
+        for rollup in self.rollups:
+            if rollup.interval <= resolution:
+                chosen = rollup
+        return chosen
@@ -0,0 +1,208 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed capacity ring buffer of (timestamp, value) pairs backed by numpy arrays
+
+    init:
+        capacity (int): number of samples held before the oldest is overwritten
+        shape (tuple): shape of each value, () for a scalar per sample
+    Details:
+        Timestamps are stored as int64 nanoseconds since the epoch and values as
+        float64. Both arrays are allocated once, so appending is O(1) and never
+        touches the allocator. Reads that fall inside one physical segment of the
+        ring return views, reads that wrap around return a concatenation of the
+        two segments.
+        Values are laid out as shape + (capacity,), so the history of each element
+        of a value is contiguous in memory.
+    """
+
+    def __init__(self, capacity: int, shape: tuple = ()):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros(tuple(shape) + (capacity,), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value: float, timestamp: int) -> None:
+        """Adds a sample, overwriting the oldest one once the buffer is full
+
+        Args:
+            value (float): value of the sample, or an array of the buffer's shape
+            timestamp (int): timestamp of the sample, in ns since the epoch
+        """
+        end = self._start + self._size
+        if end >= self.capacity:
+            end -= self.capacity
+        self._timestamps[end] = timestamp
+        self._values[..., end] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = end + 1 if end + 1 < self.capacity else 0
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def drop(self, n: int) -> None:
+        """Forgets the oldest n samples"""
+        n = min(n, self._size)
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+
+    def _bounds(self, start: int, end: int) -> tuple:
+        """Clamps python style (possibly negative) indices to the logical buffer"""
+        start, end, _ = slice(start, end).indices(self._size)
+        return start, max(start, end)
+
+    def _take(self, array: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Returns array[start:end] in logical (oldest first) order
+
+        Args:
+            array (np.ndarray): one of the backing arrays
+            start (int): first logical index
+            end (int): logical index to stop at (exclusive)
+
+        Returns:
+            np.ndarray: a view if the range is contiguous, otherwise a copy
+        """
+        first = self._start + start
+        if first >= self.capacity:
+            first -= self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return array[..., first:last]
+        return np.concatenate(
+            (array[..., first:], array[..., : last - self.capacity]), axis=-1
+        )
+
+    def timestamps(self, start: int = 0, end: int = None) -> np.ndarray:
+        start, end = self._bounds(start, end)
+        return self._take(self._timestamps, start, end)
+
+    def values(self, start: int = 0, end: int = None) -> np.ndarray:
+        start, end = self._bounds(start, end)
+        return self._take(self._values, start, end)
+
+    def slice(self, start: int = 0, end: int = None) -> tuple:
+        """Returns the timestamps and values between two logical indices
+
+        Args:
+            start (int, optional): first index, negative counts from the newest. Defaults to 0.
+            end (int, optional): index to stop at (exclusive). Defaults to None (the newest).
+
+        Returns:
+            tuple: (timestamps, values) as numpy arrays
+        """
+        start, end = self._bounds(start, end)
+        return (
+            self._take(self._timestamps, start, end),
+            self._take(self._values, start, end),
+        )
+
+    def search(self, timestamp: int, side: str = "left") -> int:
+        """Finds the logical index of a timestamp by bisection, timestamps must be appended in order
+
+        Args:
+            timestamp (int): timestamp to look for, in ns since the epoch
+            side (str, optional): "left" gives the first index with a timestamp >= timestamp,
+                "right" the first index with a timestamp > timestamp. Defaults to "left".
+
+        Returns:
+            int: logical index, between 0 and len(self)
+        """
+        first = self._start
+        last = first + self._size
+        if last <= self.capacity:
+            return int(np.searchsorted(self._timestamps[first:last], timestamp, side))
+        # Each physical segment is sorted, so the counts below the timestamp just add up
+        return int(
+            np.searchsorted(self._timestamps[first:], timestamp, side)
+            + np.searchsorted(self._timestamps[: last - self.capacity], timestamp, side)
+        )
+
+    def time_range(self, start: int = None, end: int = None) -> tuple:
+        """Returns the logical indices bounding a time range
+
+        Args:
+            start (int, optional): first timestamp (inclusive), in ns. Defaults to None (the oldest).
+            end (int, optional): last timestamp (inclusive), in ns. Defaults to None (the newest).
+
+        Returns:
+            tuple: (start, end) logical indices, end exclusive
+        """
+        first = 0 if start is None else self.search(start, "left")
+        last = self._size if end is None else self.search(end, "right")
+        return first, max(first, last)
+
+    def last(self, n: int) -> tuple:
+        """Returns the newest n samples, oldest first"""
+        return self.slice(max(self._size - n, 0))
+
+    def _newest(self) -> int:
+        """Physical index of the newest sample"""
+        i = self._start + self._size - 1
+        return i - self.capacity if i >= self.capacity else i
+
+    def head(self) -> np.ndarray:
+        """Returns a view of the newest value, for updating it in place"""
+        return self._values[..., self._newest()]
+
+    def latest(self) -> tuple:
+        """Returns the newest (timestamp, value) pair, or None if empty"""
+        if self._size == 0:
+            return None
+        i = self._newest()
+        if self._values.ndim == 1:
+            return int(self._timestamps[i]), float(self._values[i])
+        return int(self._timestamps[i]), self._values[..., i].copy()
+
+
+class ColumnStore(RingBuffer):
+    """Ring buffer of rows, one shared timestamp and one float64 column per variable
+
+    init:
+        columns (list): names of the columns, e.g. Variable_Units.variables
+        capacity (int): number of rows held before the oldest is overwritten
+    Details:
+        Each row is one tick of readings. A column that was not read in a tick
+        holds NaN. Columns are contiguous, so scanning one variable's history
+        reads consecutive memory, and a whole row is appended with one call.
+    """
+
+    def __init__(self, columns: list, capacity: int):
+        super().__init__(capacity, shape=(len(columns),))
+        self.columns = list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self._blank = np.full(len(self.columns), np.nan)
+
+    def append_value(self, column: str, value: float, timestamp: int) -> None:
+        """Sets a single column, sharing the newest row if it has the same timestamp
+
+        Args:
+            column (str): name of the column
+            value (float): value to store
+            timestamp (int): timestamp of the value, in ns since the epoch
+        """
+        if self._size == 0 or self._timestamps[self._newest()] != timestamp:
+            self.append(self._blank, timestamp)
+        self._values[self.index[column], self._newest()] = value
+
+    def column(self, column: str, start: int = 0, end: int = None) -> np.ndarray:
+        """Returns one column between two logical indices, as a view where possible"""
+        start, end = self._bounds(start, end)
+        return self._take(self._values[self.index[column]], start, end)
+
+    def column_slice(self, column: str, start: int = 0, end: int = None) -> tuple:
+        """Returns (timestamps, values) of one column between two logical indices"""
+        start, end = self._bounds(start, end)
+        return (
+            self._take(self._timestamps, start, end),
+            self._take(self._values[self.index[column]], start, end),
+        )
@@ -0,0 +1,325 @@
+import bisect
+import json
+import struct
+import numpy as np
+
+MAGIC = b"ENVG"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sBI")  # magic, version, length of the column json
+# rows, first timestamp, last timestamp, length of the timestamp stream
+BLOCK_HEADER = struct.Struct("<IqqI")
+MASK_64 = (1 << 64) - 1
+
+# (prefix, prefix bits, value bits) for delta of delta timestamps, after the single 0 bit for
+# "same interval". Timestamps are in ns, so the smallest bucket still covers ~2 us of jitter
+TIMESTAMP_BUCKETS = ((0b10, 2, 12), (0b110, 3, 20), (0b1110, 4, 32), (0b1111, 4, 64))
+
+
+class BitWriter:
+    """Appends values of any width up to 64 bits to a byte buffer, most significant bit first"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int) -> None:
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        if self._bits >= 64:
+            spare = self._bits & 7
+            self._buffer += (self._acc >> spare).to_bytes(self._bits >> 3, "big")
+            self._acc &= (1 << spare) - 1
+            self._bits = spare
+
+    def getvalue(self) -> bytes:
+        if self._bits == 0:
+            return bytes(self._buffer)
+        pad = -self._bits & 7
+        return bytes(self._buffer) + (self._acc << pad).to_bytes(
+            (self._bits + pad) >> 3, "big"
+        )
+
+
+class BitReader:
+    """Reads values written by BitWriter"""
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def read(self, bits: int) -> int:
+        pos = self._pos
+        start = pos >> 3
+        end = (pos + bits + 7) >> 3
+        chunk = int.from_bytes(self._data[start:end], "big")
+        self._pos = pos + bits
+        return (chunk >> (end * 8 - pos - bits)) & ((1 << bits) - 1)
+
+
+def encode_timestamps(timestamps: np.ndarray) -> bytes:
+    """Encodes increasing int64 timestamps as delta of deltas
+
+    Args:
+        timestamps (np.ndarray): timestamps, in ns since the epoch
+
+    Returns:
+        bytes: the encoded stream, a sampling interval that does not change costs 1 bit
+    """
+    writer = BitWriter()
+    timestamps = np.asarray(timestamps, dtype=np.int64).tolist()
+    if not timestamps:
+        return b""
+    previous = timestamps[0]
+    writer.write(previous & MASK_64, 64)
+    delta = 0
+    for timestamp in timestamps[1:]:
+        new_delta = timestamp - previous
+        dod = new_delta - delta
+        previous, delta = timestamp, new_delta
+        if dod == 0:
+            writer.write(0, 1)
+            continue
+        zigzag = dod << 1 if dod >= 0 else (-dod << 1) - 1
+        for prefix, prefix_bits, bits in TIMESTAMP_BUCKETS:
+            if zigzag < 1 << bits:
+                writer.write(prefix, prefix_bits)
+                writer.write(zigzag, bits)
+                break
+    return writer.getvalue()
+
+
+def decode_timestamps(data: bytes, rows: int) -> np.ndarray:
+    """Decodes rows timestamps written by encode_timestamps"""
+    out = np.empty(rows, dtype=np.int64)
+    if rows == 0:
+        return out
+    reader = BitReader(data)
+    read = reader.read
+    previous = read(64)
+    if previous >= 1 << 63:
+        previous -= 1 << 64
+    out[0] = previous
+    delta = 0
+    for i in range(1, rows):
+        if read(1):
+            if not read(1):
+                bits = 12
+            elif not read(1):
+                bits = 20
+            elif not read(1):
+                bits = 32
+            else:
+                bits = 64
+            zigzag = read(bits)
+            delta += zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+        previous += delta
+        out[i] = previous
+    return out
+
+
+def encode_values(values: np.ndarray) -> bytes:
+    """Encodes float64 values by XOR with the previous value
+
+    Args:
+        values (np.ndarray): values, NaN is kept as is
+
+    Returns:
+        bytes: the encoded stream, a repeated value costs 1 bit and a slowly drifting
+            one only the bits that changed
+    """
+    writer = BitWriter()
+    write = writer.write
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.uint64).tolist()
+    if not bits:
+        return b""
+    previous = bits[0]
+    write(previous, 64)
+    leading = trailing = -1
+    for value in bits[1:]:
+        xor = value ^ previous
+        previous = value
+        if xor == 0:
+            write(0, 1)
+            continue
+        new_leading = min(64 - xor.bit_length(), 31)
+        new_trailing = (xor & -xor).bit_length() - 1
+        if leading >= 0 and new_leading >= leading and new_trailing >= trailing:
+            write(0b10, 2)
+            write(xor >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = new_leading, new_trailing
+            significant = 64 - leading - trailing
+            write(0b11, 2)
+            write(leading, 5)
+            write(significant - 1, 6)
+            write(xor >> trailing, significant)
+    return writer.getvalue()
+
+
+def decode_values(data: bytes, rows: int) -> np.ndarray:
+    """Decodes rows values written by encode_values"""
+    out = [0] * rows
+    if rows == 0:
+        return np.zeros(0)
+    reader = BitReader(data)
+    read = reader.read
+    previous = out[0] = read(64)
+    leading = trailing = 0
+    for i in range(1, rows):
+        if read(1):
+            if read(1):
+                leading = read(5)
+                trailing = 64 - leading - read(6) - 1
+            previous ^= read(64 - leading - trailing) << trailing
+        out[i] = previous
+    return np.array(out, dtype=np.uint64).view(np.float64)
+
+
+class GorillaWriter:
+    """Writes columnar history to a compressed archive file, one block per write_block
+
+    init:
+        path (str): file to write, an existing file is appended to
+        columns (list): names of the columns, e.g. Variable_Units.variables
+    Details:
+        Each block holds the shared timestamps of its rows, encoded once as delta of
+        deltas, then every column XOR encoded as a separate stream. Block headers
+        carry the row count, time span and stream lengths, so a reader can skip to
+        any block, and to any column in it, without decoding what comes before.
+    """
+
+    def __init__(self, path: str, columns: list):
+        self.columns = list(columns)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            names = json.dumps(self.columns).encode()
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, len(names)) + names)
+        self._lengths = struct.Struct(f"<{len(self.columns)}I")
+
+    def write_block(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Encodes and writes one block
+
+        Args:
+            timestamps (np.ndarray): timestamps of the rows, in ns since the epoch
+            values (np.ndarray): values laid out as (columns, rows), as ColumnStore.values returns them
+        """
+        if len(timestamps) == 0:
+            return
+        stamps = encode_timestamps(timestamps)
+        streams = [encode_values(column) for column in values]
+        self._file.write(
+            BLOCK_HEADER.pack(
+                len(timestamps), int(timestamps[0]), int(timestamps[-1]), len(stamps)
+            )
+            + self._lengths.pack(*(len(stream) for stream in streams))
+            + stamps
+            + b"".join(streams)
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GorillaReader:
+    """Reads an archive written by GorillaWriter, one block at a time
+
+    init:
+        path (str): file to read
+    Details:
+        Opening the file only reads the block headers. Blocks are found by bisection
+        on their first timestamp and decoded on demand, one column at a time.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        magic, version, names_length = FILE_HEADER.unpack(
+            self._file.read(FILE_HEADER.size)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} archive")
+        self.columns = json.loads(self._file.read(names_length))
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self._lengths = struct.Struct(f"<{len(self.columns)}I")
+        # (first timestamp, last timestamp, rows, offset, stream lengths)
+        self.blocks = []
+        while True:
+            header = self._file.read(BLOCK_HEADER.size + self._lengths.size)
+            if len(header) < BLOCK_HEADER.size + self._lengths.size:
+                break
+            rows, first, last, stamps = BLOCK_HEADER.unpack_from(header)
+            lengths = (stamps,) + self._lengths.unpack_from(header, BLOCK_HEADER.size)
+            self.blocks.append((first, last, rows, self._file.tell(), lengths))
+            self._file.seek(sum(lengths), 1)
+        self._firsts = [block[0] for block in self.blocks]
+
+    def __len__(self) -> int:
+        return sum(block[2] for block in self.blocks)
+
+    def _stream(self, block: int, stream: int) -> bytes:
+        _, _, _, offset, lengths = self.blocks[block]
+        self._file.seek(offset + sum(lengths[:stream]))
+        return self._file.read(lengths[stream])
+
+    def read_block(self, block: int, column: str) -> tuple:
+        """Decodes the timestamps and one column of a block
+
+        Returns:
+            tuple: (timestamps, values) numpy arrays
+        """
+        rows = self.blocks[block][2]
+        return (
+            decode_timestamps(self._stream(block, 0), rows),
+            decode_values(self._stream(block, self.index[column] + 1), rows),
+        )
+
+    def iter_range(self, column: str, start: int = None, end: int = None):
+        """Yields (timestamps, values) of a column block by block between two timestamps
+
+        Args:
+            column (str): name of the column
+            start (int, optional): first timestamp (inclusive), in ns. Defaults to None (the oldest).
+            end (int, optional): last timestamp (inclusive), in ns. Defaults to None (the newest).
+        """
+        block = (
+            0 if start is None else max(bisect.bisect_right(self._firsts, start) - 1, 0)
+        )
+        while block < len(self.blocks):
+            first, last = self.blocks[block][:2]
+            if end is not None and first > end:
+                break
+            if start is None or last >= start:
+                timestamps, values = self.read_block(block, column)
+                lo = 0 if start is None else np.searchsorted(timestamps, start, "left")
+                hi = (
+                    len(timestamps)
+                    if end is None
+                    else np.searchsorted(timestamps, end, "right")
+                )
+                yield timestamps[lo:hi], values[lo:hi]
+            block += 1
+
+    def read(self, column: str, start: int = None, end: int = None) -> tuple:
+        """Returns (timestamps, values) of a column between two timestamps, see iter_range"""
+        parts = list(self.iter_range(column, start, end))
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        return (
+            np.concatenate([timestamps for timestamps, _ in parts]),
+            np.concatenate([values for _, values in parts]),
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,142 @@
+import asyncio
+from collections import deque
+from dataclasses import replace
+import logging
+import threading
+
+POLICIES = ("drop_oldest", "coalesce")
+
+
+class Subscription:
+    """A subscriber's bounded queue of updates from SensorData
+
+    init:
+        maxsize (int): most updates queued before the policy applies
+        policy (str): "drop_oldest" drops the oldest queued update when full,
+            "coalesce" keeps a single pending update with the latest value of every variable
+        callback (callable, optional): called with each update, in order, on a thread
+            of the subscription's own instead of reading them with get
+        on_close (callable, optional): called with the subscription when it is closed
+        log (logging, optional): logger for callbacks that raise. Defaults to the module logger.
+    Details:
+        Updates are Snapshots holding the variables written. Read them with get from
+        a thread, or with async for from an event loop, either way the reader sleeps
+        until an update is published. Publishing never waits on the reader.
+        A callback is fed from the same queue, so a slow one falls behind under the
+        policy like any reader rather than holding up the writer, and one that raises
+        is logged and counted in errors without stopping later updates or subscribers.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 64,
+        policy: str = "drop_oldest",
+        callback=None,
+        on_close=None,
+        log: logging = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.maxsize = 1 if policy == "coalesce" else maxsize
+        self.policy = policy
+        self.callback = callback
+        self.logger = logging.getLogger(__name__) if log is None else log
+        self.dropped = 0
+        self.errors = 0  # updates the callback raised on
+        self.closed = False
+        self._on_close = on_close
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._waiter = None
+        self._loop = None
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(
+                target=self._dispatch, name="subscription", daemon=True
+            )
+            self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def publish(self, update) -> None:
+        """Queues an update, applying the backpressure policy when the queue is full"""
+        if self.closed:
+            return
+        with self._ready:
+            if self.policy == "coalesce" and self._queue:
+                pending = self._queue.pop()
+                update = replace(update, values={**pending.values, **update.values})
+                self.dropped += 1
+            elif len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(update)
+            self._ready.notify()
+            self._wake()
+
+    def _dispatch(self) -> None:
+        while True:
+            update = self.get()
+            if update is None:
+                if self.closed:
+                    return
+                continue
+            try:
+                self.callback(update)
+            except Exception as error:
+                self.errors += 1
+                self.logger.warning(f"subscription callback failed: {error!r}")
+
+    def _wake(self) -> None:
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None:
+            self._loop.call_soon_threadsafe(_resolve, waiter)
+
+    def get(self, timeout: float = None):
+        """Returns the oldest queued update, waiting for one if needed
+
+        Args:
+            timeout (float, optional): seconds to wait. Defaults to None (forever).
+
+        Returns:
+            Snapshot: the update, None on timeout or once closed
+        """
+        with self._ready:
+            if not self._queue and not self.closed:
+                self._ready.wait(timeout)
+            return self._queue.popleft() if self._queue else None
+
+    def close(self) -> None:
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+            self._wake()
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            with self._ready:
+                if self._queue:
+                    return self._queue.popleft()
+                if self.closed:
+                    raise StopAsyncIteration
+                self._loop = asyncio.get_running_loop()
+                self._waiter = self._loop.create_future()
+                waiter = self._waiter
+            await waiter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _resolve(future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,167 @@
+import bisect
+
+
+class GapIndex:
+    """Sorted, disjoint time intervals in which a sensor gave no readings
+
+    init:
+        max_interval (float): seconds between two readings after which the time
+            between them counts as an outage
+        limit (int): most outages kept, the oldest are dropped past it
+    Details:
+        An outage runs from the last good reading to the next one. It is recorded when
+        readings are further apart than max_interval, or when the sensor is marked down
+        in between, e.g. after a PMS5003 read timeout or checksum mismatch. Outages are
+        appended in time order to two parallel lists of starts and ends, so a query
+        finds the outages overlapping a range by bisection instead of walking samples.
+        An outage still in progress is reported up to the time of the query.
+    """
+
+    def __init__(self, max_interval: float = 60, limit: int = 10000):
+        self.max_interval_ns = int(max_interval * 1_000_000_000)
+        self.limit = limit
+        self.first = None  # timestamp of the first reading or outage
+        self._starts = []
+        self._ends = []
+        self._last = None  # timestamp of the last good reading
+        self._down = None  # when the sensor was marked down, None while it is up
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @property
+    def max_interval(self) -> float:
+        """Seconds between two readings after which the time between them is an outage"""
+        return self.max_interval_ns / 1_000_000_000
+
+    @max_interval.setter
+    def max_interval(self, seconds: float) -> None:
+        self.max_interval_ns = int(seconds * 1_000_000_000)
+
+    def observe(self, timestamp: int) -> None:
+        """Records a good reading, timestamps in ns since the epoch"""
+        if self.first is None:
+            self.first = timestamp
+        if self._last is None:
+            if self._down is not None:
+                self._add(self._down, timestamp)
+        elif self._down is not None or timestamp - self._last > self.max_interval_ns:
+            self._add(self._last, timestamp)
+        self._last = timestamp
+        self._down = None
+
+    def mark_down(self, timestamp: int) -> None:
+        """Records a failed reading, the outage lasts until the next good one"""
+        if self.first is None:
+            self.first = timestamp
+        if self._down is None:
+            self._down = timestamp
+
+    def clear(self) -> None:
+        self.first = None
+        self._starts = []
+        self._ends = []
+        self._last = None
+        self._down = None
+
+    def _add(self, start: int, end: int) -> None:
+        if self._ends and start <= self._ends[-1]:
+            self._ends[-1] = max(end, self._ends[-1])
+            return
+        self._starts.append(start)
+        self._ends.append(end)
+        if len(self._starts) > self.limit:
+            # drop a quarter at a time, so trimming is amortized O(1)
+            drop = max(self.limit // 4, 1)
+            del self._starts[:drop]
+            del self._ends[:drop]
+
+    def _open(self, now: int = None) -> tuple:
+        """Returns the outage in progress at now as (start, now), None if there is none"""
+        if now is None:
+            return None
+        if self._last is None:
+            return None if self._down is None else (self._down, now)
+        if self._down is not None or now - self._last > self.max_interval_ns:
+            return (self._last, now) if now > self._last else None
+        return None
+
+    def gaps(self, start: int = None, end: int = None, now: int = None) -> list:
+        """Returns the outages overlapping a time range, clipped to it
+
+        Args:
+            start (int, optional): start of the range, in ns since the epoch. Defaults to None.
+            end (int, optional): end of the range, in ns since the epoch. Defaults to None.
+            now (int, optional): current time, to include an outage still in progress.
+                Defaults to None.
+
+        Returns:
+            list: (start, end) tuples, oldest first
+        """
+        first = 0 if start is None else bisect.bisect_right(self._ends, start)
+        last = (
+            len(self._starts)
+            if end is None
+            else bisect.bisect_left(self._starts, end, first)
+        )
+        out = list(zip(self._starts[first:last], self._ends[first:last]))
+        current = self._open(now)
+        if current is not None and (end is None or current[0] < end):
+            if out and current[0] <= out[-1][1]:
+                out[-1] = (out[-1][0], current[1])
+            else:
+                out.append(current)
+        if out and start is not None and out[0][0] < start:
+            out[0] = (start, out[0][1])
+        if out and end is not None and out[-1][1] > end:
+            out[-1] = (out[-1][0], end)
+        return out
+
+    def containing(self, timestamp: int) -> tuple:
+        """Returns the recorded outage a timestamp falls strictly inside, None if there is none"""
+        i = bisect.bisect_right(self._starts, timestamp) - 1
+        if i >= 0 and timestamp < self._ends[i]:
+            return self._starts[i], self._ends[i]
+        return None
+
+    def downtime(self, start: int = None, end: int = None, now: int = None) -> int:
+        """Returns the ns of a time range spent in outages, see gaps"""
+        return sum(
+            gap_end - gap_start for gap_start, gap_end in self.gaps(start, end, now)
+        )
+
+    def spans(self, start: int = None, end: int = None, now: int = None) -> list:
+        """Returns the parts of a time range outside of outages, the complement of gaps
+
+        Returns:
+            list: (start, end) tuples, oldest first, empty if nothing was ever observed
+        """
+        if self.first is None:
+            return []
+        start = self.first if start is None else start
+        end = (self._last if now is None else now) if end is None else end
+        out = []
+        for gap_start, gap_end in self.gaps(start, end, now):
+            if gap_start > start:
+                out.append((start, gap_start))
+            start = max(start, gap_end)
+        if end is not None and end > start:
+            out.append((start, end))
+        return out
+
+    def coverage(self, start: int = None, end: int = None, now: int = None) -> float:
+        """Returns the fraction of a time range outside of outages, None for an empty range
+
+        Args:
+            start (int, optional): start of the range, in ns. Defaults to None (the first observation).
+            end (int, optional): end of the range, in ns. Defaults to None (now, or the
+                last reading without now).
+            now (int, optional): current time, see gaps. Defaults to None.
+        """
+        if self.first is None:
+            return None
+        start = self.first if start is None else start
+        end = (self._last if now is None else now) if end is None else end
+        if end is None or end <= start:
+            return None
+        return 1 - self.downtime(start, end, now) / (end - start)
@@ -0,0 +1,178 @@
+HOUR_NS = 3600 * 1_000_000_000
+
+# US EPA AQI breakpoints, (concentration low, concentration high, index low, index high)
+PM25_BREAKPOINTS = (
+    (0.0, 9.0, 0, 50),
+    (9.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 125.4, 151, 200),
+    (125.5, 225.4, 201, 300),
+    (225.5, 325.4, 301, 500),
+)
+PM10_BREAKPOINTS = (
+    (0, 54, 0, 50),
+    (55, 154, 51, 100),
+    (155, 254, 101, 150),
+    (255, 354, 151, 200),
+    (355, 424, 201, 300),
+    (425, 604, 301, 500),
+)
+
+
+def aqi(concentration: float, breakpoints: tuple) -> int:
+    """Converts a concentration to an AQI by linear interpolation within its breakpoint band
+
+    Args:
+        concentration (float): concentration, in the units of the breakpoints
+        breakpoints (tuple): (concentration low, concentration high, index low, index high) bands
+
+    Returns:
+        int: the index, capped at the top of the last band, None if concentration is None
+    """
+    if concentration is None:
+        return None
+    for c_low, c_high, i_low, i_high in breakpoints:
+        # EPA truncates to the precision of the breakpoints, so compare with the next band
+        if concentration < c_high + (0.1 if isinstance(c_high, float) else 1):
+            concentration = max(concentration, c_low)
+            return round(
+                (i_high - i_low) / (c_high - c_low) * (concentration - c_low) + i_low
+            )
+    return breakpoints[-1][3]
+
+
+class HourlyAverages:
+    """Sums and counts of a series in hourly buckets, for the last few hours
+
+    init:
+        hours (int): number of hourly buckets kept, including the current hour
+    Details:
+        Adding a sample only touches the bucket of its hour, so it is O(1), moving
+        into a new hour clears the buckets that fell out of the window. Hours without
+        samples, e.g. when the particle sensor timed out, stay empty and are skipped.
+    """
+
+    def __init__(self, hours: int):
+        self.hours = hours
+        self._sums = [0.0] * hours
+        self._counts = [0] * hours
+        self._hour = None
+
+    def add(self, value: float, timestamp: int) -> None:
+        """Adds a sample, timestamps in ns since the epoch"""
+        if value is None or value != value:  # NaN
+            return
+        hour = timestamp // HOUR_NS
+        if self._hour is None:
+            self._hour = hour
+        elif hour > self._hour:
+            # empty the hours the window moved past
+            for passed in range(self._hour + 1, min(hour, self._hour + self.hours) + 1):
+                self._sums[passed % self.hours] = 0.0
+                self._counts[passed % self.hours] = 0
+            self._hour = hour
+        elif hour <= self._hour - self.hours:
+            return  # older than the window
+        slot = hour % self.hours
+        self._sums[slot] += value
+        self._counts[slot] += 1
+
+    def clear(self) -> None:
+        self._sums = [0.0] * self.hours
+        self._counts = [0] * self.hours
+        self._hour = None
+
+    def averages(self, timestamp: int = None) -> list:
+        """Returns the hourly averages, newest hour first, None for hours without samples
+
+        Args:
+            timestamp (int, optional): time the window ends at, in ns since the epoch, so hours
+                since the last sample count as empty. Defaults to None (the hour of the last sample).
+        """
+        if self._hour is None:
+            return [None] * self.hours
+        hour = (
+            self._hour if timestamp is None else max(timestamp // HOUR_NS, self._hour)
+        )
+        out = []
+        for age in range(self.hours):
+            if hour - age > self._hour or hour - age <= self._hour - self.hours:
+                out.append(None)
+                continue
+            slot = (hour - age) % self.hours
+            count = self._counts[slot]
+            out.append(self._sums[slot] / count if count else None)
+        return out
+
+
+class NowCast(HourlyAverages):
+    """Incremental US EPA NowCast of a particulate series
+
+    init:
+        hours (int): hours the NowCast covers. Defaults to 12.
+        breakpoints (tuple, optional): AQI breakpoints for the pollutant, None if it has no AQI
+        min_weight (float): floor of the weight factor, 0.5 for particulates
+    Details:
+        The NowCast weights hour i back by w ** i, with w the ratio of the lowest to
+        the highest hourly average in the window, so a steady series gives a plain
+        average and a changing one leans on recent hours. As the EPA requires, there
+        is no NowCast unless 2 of the 3 most recent hours have samples.
+    """
+
+    def __init__(
+        self, hours: int = 12, breakpoints: tuple = None, min_weight: float = 0.5
+    ):
+        super().__init__(hours)
+        self.breakpoints = breakpoints
+        self.min_weight = min_weight
+
+    def value(self, timestamp: int = None) -> float:
+        """Returns the NowCast concentration, None if the recent hours are too sparse
+
+        Args:
+            timestamp (int, optional): see HourlyAverages.averages. Defaults to None.
+        """
+        averages = self.averages(timestamp)
+        if sum(average is not None for average in averages[:3]) < 2:
+            return None
+        valid = [average for average in averages if average is not None]
+        low, high = min(valid), max(valid)
+        weight = max(low / high if high > 0 else 1.0, self.min_weight)
+        total = norm = 0.0
+        factor = 1.0
+        for average in averages:
+            if average is not None:
+                total += factor * average
+                norm += factor
+            factor *= weight
+        return total / norm
+
+    def index(self, timestamp: int = None) -> int:
+        """Returns the AQI of the NowCast, None without breakpoints or a NowCast"""
+        if self.breakpoints is None:
+            return None
+        return aqi(self.value(timestamp), self.breakpoints)
+
+
+class TimeWeightedAverage(HourlyAverages):
+    """Average of the hourly averages over a window, e.g. a 24 hour particulate average
+
+    init:
+        hours (int): hours averaged over. Defaults to 24.
+        coverage (float): fraction of the hours that need samples. Defaults to 0.75.
+    """
+
+    def __init__(self, hours: int = 24, coverage: float = 0.75):
+        super().__init__(hours)
+        self.coverage = coverage
+
+    def value(self, timestamp: int = None) -> float:
+        """Returns the average, None if too few hours have samples
+
+        Args:
+            timestamp (int, optional): see HourlyAverages.averages. Defaults to None.
+        """
+        valid = [average for average in self.averages(timestamp) if average is not None]
+        if not valid or len(valid) < self.coverage * self.hours:
+            return None
+        return sum(valid) / len(valid)
@@ -0,0 +1,68 @@
+import numpy as np
+
+METHODS = ("ffill", "linear")
+
+
+def time_grid(start: int, end: int, interval: int) -> np.ndarray:
+    """Returns the timestamps that are multiples of interval between start and end (inclusive)
+
+    Args:
+        start (int): first timestamp, in ns since the epoch
+        end (int): last timestamp, in ns since the epoch
+        interval (int): spacing of the grid, in ns
+    """
+    first = start + (-start % interval)
+    return np.arange(first, end + 1, interval, dtype=np.int64)
+
+
+def resample(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    grid: np.ndarray,
+    method: str = "ffill",
+    tolerance: int = None,
+) -> np.ndarray:
+    """Aligns one series to a time grid
+
+    Args:
+        timestamps (np.ndarray): increasing timestamps of the series, in ns since the epoch
+        values (np.ndarray): values of the series, NaN where the sensor was not read
+        grid (np.ndarray): timestamps to align to, in ns since the epoch
+        method (str, optional): "ffill" carries the last value forward (an as-of join),
+            "linear" interpolates between the readings either side. Defaults to "ffill".
+        tolerance (int, optional): ns a reading stays valid for, points further than this
+            from a reading are NaN. Defaults to None (no limit).
+
+    Returns:
+        np.ndarray: one value per grid point, NaN before the first reading or after the last
+            one when interpolating
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    read = ~np.isnan(values)
+    timestamps = timestamps[read]
+    values = values[read]
+    out = np.full(len(grid), np.nan)
+    if len(timestamps) == 0:
+        return out
+    before = np.searchsorted(timestamps, grid, "right") - 1
+    known = before >= 0
+    if method == "ffill":
+        out[known] = values[before[known]]
+        if tolerance is not None:
+            out[known & (grid - timestamps[before.clip(0)] > tolerance)] = np.nan
+        return out
+    # interpolate on offsets from the first reading, ns since the epoch do not fit a float exactly
+    origin = timestamps[0]
+    out = np.interp(
+        (grid - origin).astype(np.float64),
+        (timestamps - origin).astype(np.float64),
+        values,
+        left=np.nan,
+        right=np.nan,
+    )
+    if tolerance is not None:
+        after = np.minimum(before + 1, len(timestamps) - 1)
+        gap = timestamps[after] - timestamps[before.clip(0)]
+        out[~known | (gap > tolerance)] = np.nan
+    return out
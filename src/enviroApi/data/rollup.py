@@ -0,0 +1,99 @@
+import numpy as np
+from enviroApi.data.buffer import RingBuffer
+
+MIN, MAX, SUM, COUNT = range(4)
+STATS = {"min": MIN, "max": MAX, "sum": SUM, "count": COUNT}
+
+
+class Rollup(RingBuffer):
+    """Ring buffer of fixed width time buckets holding the min, max, sum and count of each column
+
+    init:
+        columns (list): names of the columns, e.g. Variable_Units.variables
+        interval (int): width of a bucket, in seconds
+        capacity (int): number of buckets held before the oldest is overwritten
+    Details:
+        Buckets are updated in place as readings arrive, so a reading costs O(1)
+        whatever the width of the bucket. The timestamp of a bucket is its start.
+        NaN readings (a sensor not read in a tick) are not counted.
+    """
+
+    def __init__(self, columns: list, interval: int, capacity: int):
+        super().__init__(capacity, shape=(len(STATS), len(columns)))
+        self.columns = list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.interval = interval
+        self.interval_ns = int(interval * 1_000_000_000)
+        self._bucket = None
+        self._empty = np.zeros((len(STATS), len(self.columns)))
+        self._empty[MIN] = np.nan
+        self._empty[MAX] = np.nan
+
+    def _current(self, timestamp: int) -> np.ndarray:
+        """Returns a view of the bucket for timestamp, starting a new one when it moves on"""
+        bucket = timestamp - timestamp % self.interval_ns
+        if self._bucket is None or bucket > self._bucket:
+            self.append(self._empty, bucket)
+            self._bucket = bucket
+        return self.head()
+
+    def add(self, row: np.ndarray, timestamp: int) -> None:
+        """Folds one row of readings into its bucket
+
+        Args:
+            row (np.ndarray): one value per column, NaN for columns not read
+            timestamp (int): timestamp of the row, in ns since the epoch
+        """
+        bucket = self._current(timestamp)
+        read = ~np.isnan(row)
+        np.fmin(bucket[MIN], row, out=bucket[MIN])
+        np.fmax(bucket[MAX], row, out=bucket[MAX])
+        np.add(bucket[SUM], row, out=bucket[SUM], where=read)
+        bucket[COUNT] += read
+
+    def add_value(self, column: str, value: float, timestamp: int) -> None:
+        """Folds a single reading into its bucket"""
+        if value != value:  # NaN
+            return
+        bucket = self._current(timestamp)
+        i = self.index[column]
+        if not bucket[COUNT, i] or value < bucket[MIN, i]:
+            bucket[MIN, i] = value
+        if not bucket[COUNT, i] or value > bucket[MAX, i]:
+            bucket[MAX, i] = value
+        bucket[SUM, i] += value
+        bucket[COUNT, i] += 1
+
+    def clear(self) -> None:
+        super().clear()
+        self._bucket = None
+
+    def time_range(self, start: int = None, end: int = None) -> tuple:
+        # include the bucket that start falls in
+        if start is not None:
+            start -= start % self.interval_ns
+        return super().time_range(start, end)
+
+    def column_slice(
+        self, column: str, start: int = 0, end: int = None, stat: str = "mean"
+    ) -> tuple:
+        """Returns (timestamps, values) of one statistic of one column between two logical indices
+
+        Args:
+            column (str): name of the column
+            start (int, optional): first bucket. Defaults to 0.
+            end (int, optional): bucket to stop at (exclusive). Defaults to None (the newest).
+            stat (str, optional): one of mean, min, max, sum or count. Defaults to "mean".
+
+        Returns:
+            tuple: (timestamps, values), the mean is NaN for buckets without readings
+        """
+        start, end = self._bounds(start, end)
+        timestamps = self._take(self._timestamps, start, end)
+        i = self.index[column]
+        if stat != "mean":
+            return timestamps, self._take(self._values[STATS[stat], i], start, end)
+        total = self._take(self._values[SUM, i], start, end)
+        count = self._take(self._values[COUNT, i], start, end)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return timestamps, total / count
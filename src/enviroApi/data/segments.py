@@ -0,0 +1,196 @@
+from collections import OrderedDict
+import bisect
+import json
+import os
+import numpy as np
+
+
+class SegmentStore:
+    """Append-only history on disk, in fixed size record files read back through np.memmap
+
+    init:
+        path (str): directory that holds the segment files
+        columns (list): names of the columns, e.g. Variable_Units.variables
+        segment_rows (int): number of records in a segment before a new file is started
+        max_maps (int): most segments kept mapped at once. Defaults to 8.
+    Details:
+        A record is an int64 timestamp (ns since the epoch) followed by one float64
+        per column, so record i of a segment is at byte i * record size and nothing
+        has to be parsed to read it. Records must be appended in timestamp order.
+        Reads map the files with np.memmap and leave caching to the page cache, so
+        the RAM used does not grow with the amount of history on disk. Only the
+        max_maps segments read last stay mapped, each holds a file descriptor, and a
+        segment's first timestamp is in its file name, so opening the store maps none.
+        The columns are kept in columns.json next to the segments, a directory
+        written with different columns is refused.
+    """
+
+    def __init__(
+        self, path: str, columns: list, segment_rows: int = 86400, max_maps: int = 8
+    ):
+        self.path = path
+        self.columns = list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.segment_rows = segment_rows
+        self.dtype = np.dtype(
+            [("timestamp", "<i8"), ("values", "<f8", (len(self.columns),))]
+        )
+        self._files = []
+        self._first = []  # first timestamp of each segment
+        self._offsets = []  # number of records before each segment
+        self._rows = 0
+        self.max_maps = max_maps
+        self._maps = OrderedDict()  # segment to its records, least recently read first
+        os.makedirs(path, exist_ok=True)
+        self._check_columns()
+        self._load()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _check_columns(self) -> None:
+        columns_path = os.path.join(self.path, "columns.json")
+        if os.path.exists(columns_path):
+            with open(columns_path, "r") as f:
+                columns = json.load(f)
+            if columns != self.columns:
+                raise ValueError(
+                    f"{self.path} holds segments for columns {columns}, not {self.columns}"
+                )
+        else:
+            with open(columns_path, "w") as f:
+                json.dump(self.columns, f)
+
+    def _load(self) -> None:
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".seg"):
+                continue
+            path = os.path.join(self.path, name)
+            rows = os.path.getsize(path) // self.dtype.itemsize
+            if rows == 0:
+                continue
+            self._files.append(path)
+            self._first.append(self._first_timestamp(path))
+            self._offsets.append(self._rows)
+            self._rows += rows
+
+    def _first_timestamp(self, path: str) -> int:
+        """Returns the first timestamp of a segment, from its name when it has one"""
+        stem = os.path.basename(path)[: -len(".seg")]
+        if "-" in stem:
+            return int(stem.split("-", 1)[1])
+        # named before first timestamps went into the name
+        with open(path, "rb") as f:
+            return int(np.frombuffer(f.read(8), dtype="<i8")[0])
+
+    def _map(self, segment: int) -> np.ndarray:
+        """Returns the records of a segment, mapped into memory"""
+        records = self._maps.get(segment)
+        if records is None:
+            records = np.memmap(self._files[segment], dtype=self.dtype, mode="r")
+            self._maps[segment] = records
+            if len(self._maps) > self.max_maps:
+                # views already handed out keep their map open until they are dropped
+                self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(segment)
+        return records
+
+    def _segment_rows(self, segment: int) -> int:
+        end = (
+            self._offsets[segment + 1]
+            if segment + 1 < len(self._offsets)
+            else self._rows
+        )
+        return end - self._offsets[segment]
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Writes rows to the end of the store
+
+        Args:
+            timestamps (np.ndarray): timestamps of the rows, in ns since the epoch
+            values (np.ndarray): values laid out as (columns, rows), as ColumnStore.values returns them
+        """
+        records = np.empty(len(timestamps), dtype=self.dtype)
+        records["timestamp"] = timestamps
+        records["values"] = values.T
+        written = 0
+        while written < len(records):
+            if (
+                not self._files
+                or self._segment_rows(len(self._files) - 1) >= self.segment_rows
+            ):
+                first = int(records["timestamp"][written])
+                self._files.append(
+                    os.path.join(self.path, f"{len(self._files):08d}-{first}.seg")
+                )
+                self._first.append(first)
+                self._offsets.append(self._rows)
+            segment = len(self._files) - 1
+            n = min(
+                self.segment_rows - self._segment_rows(segment), len(records) - written
+            )
+            with open(self._files[segment], "ab") as f:
+                f.write(records[written : written + n].tobytes())
+            # the open segment grew, map it again on the next read
+            self._maps.pop(segment, None)
+            self._rows += n
+            written += n
+
+    def search(self, timestamp: int, side: str = "left") -> int:
+        """Finds the record index of a timestamp by bisection, see RingBuffer.search"""
+        if not self._files:
+            return 0
+        if side == "left":
+            segment = bisect.bisect_left(self._first, timestamp) - 1
+        else:
+            segment = bisect.bisect_right(self._first, timestamp) - 1
+        if segment < 0:
+            return 0
+        timestamps = self._map(segment)["timestamp"]
+        return self._offsets[segment] + int(
+            np.searchsorted(timestamps, timestamp, side)
+        )
+
+    def _parts(self, start: int, end: int):
+        """Yields (records, first, last) of each segment a range of record indices spans"""
+        start, end, _ = slice(start, end).indices(self._rows)
+        segment = max(bisect.bisect_right(self._offsets, start) - 1, 0)
+        while start < end and segment < len(self._files):
+            records = self._map(segment)
+            first = start - self._offsets[segment]
+            last = min(end - self._offsets[segment], len(records))
+            yield records, first, last
+            start = self._offsets[segment] + last
+            segment += 1
+
+    def column_slice(self, column: str, start: int = 0, end: int = None) -> tuple:
+        """Returns (timestamps, values) of one column between two record indices
+
+        Details:
+            The arrays are views of the mapped file when the range is inside one
+            segment, otherwise the segments are concatenated.
+        """
+        i = self.index[column]
+        parts = [
+            (records["timestamp"][first:last], records["values"][first:last, i])
+            for records, first, last in self._parts(start, end)
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if len(parts) == 1:
+            return parts[0]
+        return (
+            np.concatenate([timestamps for timestamps, _ in parts]),
+            np.concatenate([values for _, values in parts]),
+        )
+
+    def timestamps(self, start: int = 0, end: int = None) -> np.ndarray:
+        """Returns the timestamps between two record indices, see column_slice"""
+        parts = [
+            records["timestamp"][first:last]
+            for records, first, last in self._parts(start, end)
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
@@ -0,0 +1,165 @@
+from collections import deque
+import math
+import random
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang and Liberty)
+
+    init:
+        k (int): size of the top compactor, the rank error is roughly 1.7 / k
+        c (float): how much smaller each lower compactor is than the one above it
+    Details:
+        Values go into the bottom compactor. When the sketch is full, the lowest
+        compactor over its capacity is sorted and every other value is promoted
+        one level up, where each value stands for twice as many samples. Memory
+        is bounded by about k / (1 - c) values whatever the number of samples,
+        and two sketches merge by concatenating their levels and compacting.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3):
+        self.k = k
+        self.c = c
+        self.compactors = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._size = 0
+        self._max_size = 0
+        self._grow()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.c**depth * self.k)) + 1
+
+    def add(self, value: float) -> None:
+        if value != value:  # NaN
+            return
+        self.compactors[0].append(value)
+        self.count += 1
+        self._size += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        while self._size >= self._max_size:
+            for height, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(height):
+                    if height + 1 >= len(self.compactors):
+                        self._grow()
+                    items.sort()
+                    keep = [items.pop()] if len(items) % 2 else []
+                    self.compactors[height + 1].extend(
+                        items[random.getrandbits(1) :: 2]
+                    )
+                    self._size -= len(items) - len(items) // 2
+                    items[:] = keep
+                    break
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Folds another sketch into this one"""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.count += other.count
+        self._size += other._size
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def quantiles(self, qs: list) -> list:
+        """Returns the estimated value at each quantile
+
+        Args:
+            qs (list): quantiles, between 0 and 1
+
+        Returns:
+            list: one value per quantile, NaN if the sketch is empty
+        """
+        if self.count == 0:
+            return [math.nan for _ in qs]
+        weighted = sorted(
+            (value, 1 << height)
+            for height, items in enumerate(self.compactors)
+            for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        out = []
+        for q in qs:
+            if q <= 0:
+                out.append(self.min)
+                continue
+            if q >= 1:
+                out.append(self.max)
+                continue
+            target = q * total
+            rank = 0
+            for value, weight in weighted:
+                rank += weight
+                if rank >= target:
+                    break
+            out.append(value)
+        return out
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+
+class SketchSeries:
+    """A KLLSketch per fixed width time bucket, kept for a fixed number of buckets
+
+    init:
+        interval (int): width of a bucket, in seconds
+        buckets (int): number of buckets kept
+        k (int): size of each sketch, see KLLSketch
+    Details:
+        Samples go into the sketch of their bucket. A query merges the sketches of
+        the buckets it covers into a new one, so hourly sketches combine into a day
+        or a week without touching the samples. Windows are rounded out to whole
+        buckets, calendar windows that start and end on a bucket boundary are exact,
+        the end being exclusive.
+    """
+
+    def __init__(self, interval: int = 3600, buckets: int = 192, k: int = 200):
+        self.interval_ns = int(interval * 1_000_000_000)
+        self.k = k
+        self._buckets = deque(maxlen=buckets)  # (bucket start, sketch)
+
+    def add(self, value: float, timestamp: int) -> None:
+        """Adds a sample, timestamps in ns since the epoch"""
+        if value != value:  # NaN
+            return
+        bucket = timestamp - timestamp % self.interval_ns
+        if not self._buckets or bucket > self._buckets[-1][0]:
+            self._buckets.append((bucket, KLLSketch(self.k)))
+        self._buckets[-1][1].add(value)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def sketch(self, start: int = None, end: int = None) -> KLLSketch:
+        """Returns a sketch of the samples between two timestamps, rounded out to whole buckets
+
+        An end on a bucket boundary is exclusive, so the bucket starting there is left out.
+        """
+        merged = KLLSketch(self.k)
+        for bucket, sketch in self._buckets:
+            if start is not None and bucket + self.interval_ns <= start:
+                continue
+            # buckets start on boundaries, so this only drops a bucket starting at end
+            if end is not None and bucket >= end:
+                break
+            merged.merge(sketch)
+        return merged
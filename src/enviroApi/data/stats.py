@@ -0,0 +1,152 @@
+from collections import deque
+from dataclasses import dataclass
+import math
+
+
+@dataclass
+class Stats:
+    """Dataclass to hold a snapshot of rolling statistics
+    init:
+        count (int): number of samples in the window
+        mean (float): mean of the window
+        variance (float): sample variance of the window
+        min (float): smallest value in the window
+        max (float): largest value in the window
+    Returns:
+        None
+    """
+
+    count: int
+    mean: float
+    variance: float
+    min: float
+    max: float
+
+
+class RollingStats:
+    """Windowed mean, variance, min and max, updated in O(1) amortized per sample
+
+    init:
+        count (int, optional): keep at most this many samples. Defaults to None (no limit).
+        window (float, optional): keep samples from the last window seconds. Defaults to None (no limit).
+    Details:
+        Mean and variance use Welford's algorithm, with the oldest sample removed
+        by running the update backwards when it leaves the window. Min and max
+        are kept in monotonic deques, so each sample is pushed and popped at most
+        once. NaN values are ignored.
+    """
+
+    def __init__(self, count: int = None, window: float = None):
+        self.count = count
+        self.window_ns = None if window is None else int(window * 1_000_000_000)
+        self._samples = deque()
+        self._mins = deque()
+        self._maxs = deque()
+        self._seq = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, value: float, timestamp: int) -> None:
+        """Adds a sample and drops any that have left the window
+
+        Args:
+            value (float): value of the sample
+            timestamp (int): timestamp of the sample, in ns since the epoch
+        """
+        if value != value:  # NaN
+            return
+        self._seq += 1
+        self._samples.append((timestamp, value, self._seq))
+        n = len(self._samples)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append((self._seq, value))
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append((self._seq, value))
+        self.expire(timestamp)
+
+    def clear(self) -> None:
+        self._samples.clear()
+        self._mins.clear()
+        self._maxs.clear()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def expire(self, timestamp: int) -> None:
+        """Drops samples that are outside the window as of timestamp"""
+        while self._samples and (
+            (self.count is not None and len(self._samples) > self.count)
+            or (
+                self.window_ns is not None
+                and timestamp - self._samples[0][0] > self.window_ns
+            )
+        ):
+            self._remove()
+
+    def _remove(self) -> None:
+        _, value, seq = self._samples.popleft()
+        n = len(self._samples)
+        if n == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+        else:
+            delta = value - self._mean
+            self._mean -= delta / n
+            self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+        if self._mins[0][0] == seq:
+            self._mins.popleft()
+        if self._maxs[0][0] == seq:
+            self._maxs.popleft()
+
+    @property
+    def oldest(self) -> tuple:
+        """(timestamp, value) of the oldest sample in the window, None if it is empty"""
+        return self._samples[0][:2] if self._samples else None
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._samples else math.nan
+
+    @property
+    def variance(self) -> float:
+        n = len(self._samples)
+        return self._m2 / (n - 1) if n > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else math.nan
+
+    def snapshot(self, timestamp: int = None) -> Stats:
+        """Returns the statistics of the window, as of timestamp if given
+
+        Args:
+            timestamp (int, optional): now, in ns since the epoch. Once even the newest
+                sample has left the window by then the stats are empty, rather than
+                holding the last window until a sample is added to expire it.
+                Defaults to None (as of the newest sample).
+        Details:
+            Short of that the window is as of the newest sample, kept in O(1) by add.
+        """
+        if (
+            timestamp is not None
+            and self.window_ns is not None
+            and self._samples
+            and timestamp - self._samples[-1][0] > self.window_ns
+        ):
+            return Stats(0, math.nan, math.nan, math.nan, math.nan)
+        return Stats(len(self._samples), self.mean, self.variance, self.min, self.max)
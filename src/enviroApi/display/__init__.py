@@ -1,17 +1,19 @@
 import colorsys
 import sys
 import time
-from st7735 import ST7735  # for the display
 from fonts.ttf import RobotoMedium as UserFont
 from PIL import Image, ImageDraw, ImageFont
 from enviroApi.config import load_display_config
+from enviroApi.data.stats import Stats
+from enviroApi.hardware.backends import get_backend
 
 # Create ST7735 LCD display class
 
 
 class Display:
-    def __init__(self):
-        self.st7735 = ST7735(
+    def __init__(self, backend=None):
+        # the ST7735 comes from the backend, so a SimBackend can stand in for the lcd
+        self.st7735 = get_backend(backend).display(
             port=0,
             cs=1,
             dc="GPIO9",
@@ -30,8 +32,8 @@ class Display:
 
     def _setup(self):
         # Set up canvas and font
-        self.img = Image.new("RGB", (WIDTH, HEIGHT), color=(0, 0, 0))
-        self.draw = ImageDraw.Draw(img)
+        self.img = Image.new("RGB", (self.width, self.height), color=(0, 0, 0))
+        self.draw = ImageDraw.Draw(self.img)
         self.font_size_small = 10
         self.font_size_large = 20
         self.font = ImageFont.truetype(UserFont, self.font_size_large)
@@ -41,14 +43,19 @@ class Display:
         # The position of the top bar
         self.top_pos = 25
 
-    def display_text(self, variable, data, unit):
+    def display_text(self, variable, data, unit, stats: Stats = None):
         # NOTE: THIS DOES NOT WORK!!!!!
         # Maintain length of list
         values[variable] = values[variable][1:] + [data]
         # Scale the values for the variable between 0 and 1
         # TO DO - Normalize Text
-        vmin = min(values[variable])
-        vmax = max(values[variable])
+        # Use SensorData.get_stats when available rather than rescanning the values
+        if stats is not None and stats.count:
+            vmin = stats.min
+            vmax = stats.max
+        else:
+            vmin = min(values[variable])
+            vmax = max(values[variable])
         colours = [(v - vmin + 1) / (vmax - vmin + 1) for v in values[variable]]
         # Format the variable name and value
         # TO DO Set Message
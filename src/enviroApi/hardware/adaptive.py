@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+
+from enviroApi.data.stats import RollingStats
+
+
+@dataclass
+class Threshold:
+    """Dataclass to hold when a reading counts as changing
+    init:
+        rate (float): change per second, between the oldest and newest samples of the window
+        std (float): standard deviation of the samples in the window
+    Returns:
+        None
+    """
+
+    rate: float
+    std: float
+
+
+# above the noise of the sensors, below what a window, heater or weather front does
+THRESHOLDS = {
+    "temperature": Threshold(rate=0.5 / 600, std=0.2),
+    "pressure": Threshold(rate=2.0 / 3600, std=0.3),
+    "humidity": Threshold(rate=2.0 / 600, std=1.0),
+    "cputemperature": Threshold(rate=2.0 / 60, std=1.5),
+}
+
+# (fastest, slowest) period in seconds of the groups sampled adaptively
+ADAPTIVE_PERIODS = {
+    "climate": (15.0, 300.0),
+    "cpu": (15.0, 300.0),
+}
+
+
+class AdaptiveRate:
+    """Sampling period of a group of sensors that follows how fast its readings change
+
+    init:
+        period (float): seconds between samples to start with
+        min_period (float): fastest period, used while a reading is changing
+        max_period (float): slowest period, backed off to while every reading is flat
+        thresholds (dict, optional): reading name to Threshold, readings without one are
+            ignored. Defaults to None (THRESHOLDS).
+        window (float): seconds of samples the change is measured over. Defaults to 600.
+        backoff (float): factor the period grows by per flat sample. Defaults to 1.5.
+    Details:
+        Each reading's samples go into a RollingStats window. A reading is changing
+        when its slope across the window (once that spans a quarter of it) or its
+        standard deviation in the window is over its threshold. Then the period drops
+        straight to min_period, so an event is followed at the fast rate from its first
+        sample, and stays there while the event is in the window. Once everything is
+        flat it grows by backoff per sample up to max_period, so a quiet room costs a
+        sample every max_period seconds.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        min_period: float,
+        max_period: float,
+        thresholds: dict = None,
+        window: float = 600.0,
+        backoff: float = 1.5,
+    ):
+        self.min_period = min_period
+        self.max_period = max_period
+        self.period = min(max(period, min_period), max_period)
+        self.thresholds = THRESHOLDS if thresholds is None else thresholds
+        self.window = window
+        self.backoff = backoff
+        self.stats = {}
+        self.changes = 0  # samples that found a reading changing
+
+    def update(self, readings: list) -> float:
+        """Adds a sample of the group's readings, returns the period until the next one
+
+        Args:
+            readings (list): Values of the sample, NaN values are skipped
+        """
+        changing = False
+        for reading in readings:
+            threshold = self.thresholds.get(reading.name)
+            if threshold is None or reading.value != reading.value:
+                continue
+            stats = self.stats.get(reading.name)
+            if stats is None:
+                stats = self.stats[reading.name] = RollingStats(window=self.window)
+            stats.add(reading.value, reading.timestamp)
+            changing |= self._changing(stats, reading, threshold)
+        if changing:
+            self.changes += 1
+            self.period = self.min_period
+        else:
+            self.period = min(self.period * self.backoff, self.max_period)
+        return self.period
+
+    def _changing(self, stats: RollingStats, reading, threshold: Threshold) -> bool:
+        if len(stats) < 2:
+            return False
+        timestamp, value = stats.oldest
+        seconds = (reading.timestamp - timestamp) / 1e9
+        # over a few seconds the slope is mostly noise, so it needs some of the window
+        if (
+            seconds >= self.window / 4
+            and abs(reading.value - value) > threshold.rate * seconds
+        ):
+            return True
+        return stats.std > threshold.std
@@ -0,0 +1,193 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# bus of each group of sensors, in the order observe_sensors reads them
+GROUP_BUSES = {
+    "cpu": "sysfs",
+    "climate": "i2c",
+    "light": "i2c",
+    "gas": "adc",
+    "particle": "uart",
+    "eco2_tvoc": "i2c",
+}
+
+# device, and CircuitBreaker, of each group of sensors
+GROUP_DEVICES = {
+    "cpu": "cpu",
+    "climate": "bme280",
+    "light": "ltr559",
+    "gas": "gas",
+    "particle": "pms5003",
+    "eco2_tvoc": "sgp30",
+}
+
+
+class AsyncSensors:
+    """Async counterparts of the Sensors observe methods, mixed into Sensors
+
+    Details:
+        The driver calls block, so they run on a bounded thread pool (aio_workers
+        threads) and are awaited with a timeout, by default the bus timeout from
+        BusPool. Calls on the same bus wait on an asyncio lock for each other, the
+        way the bus threads of scan_sensors do. A driver call cannot be interrupted,
+        so a call that times out or whose caller is cancelled keeps its bus until
+        it returns, but the caller gets its TimeoutError or CancelledError at once.
+        A group whose call times out is charged to its device's CircuitBreaker, as a
+        scan that overruns its bus is, but not one that timed out waiting for the bus.
+        e.g. async for group, readings in sensors.astream_sensors(): ...
+    """
+
+    aio_workers = 4
+
+    def _aio_executor(self) -> ThreadPoolExecutor:
+        if getattr(self, "_executor", None) is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.aio_workers, thread_name_prefix="sensors-aio"
+            )
+        return self._executor
+
+    def _aio_lock(self, bus: str) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if getattr(self, "_aio_loop", None) is not loop:
+            # asyncio locks belong to one loop, start afresh under a new one
+            self._aio_loop = loop
+            self._aio_locks = {}
+        if bus not in self._aio_locks:
+            self._aio_locks[bus] = asyncio.Lock()
+        return self._aio_locks[bus]
+
+    async def _in_executor(
+        self, bus: str, call, timeout: float = None, started: list = None
+    ):
+        """Runs a blocking call on the pool with the bus held, waiting at most timeout seconds
+
+        Args:
+            started (list, optional): appended to once the call has the bus, to tell a
+                call that hung from one that timed out waiting for the bus. Defaults to None.
+
+        Details:
+            The timeout counts from the call, so time spent waiting for the bus counts.
+        """
+        if timeout is None:
+            timeout = self.buses.timeouts.get(bus)
+        return await asyncio.wait_for(self._locked(bus, call, started), timeout)
+
+    async def _locked(self, bus: str, call, started: list = None):
+        lock = self._aio_lock(bus)
+        await lock.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._aio_executor(), call
+            )
+        except BaseException:
+            lock.release()
+            raise
+        if started is not None:
+            started.append(call)
+        # release the bus when the driver returns, not when the caller gives up
+        future.add_done_callback(lambda done: self._release(lock, done))
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _release(lock: asyncio.Lock, future: asyncio.Future) -> None:
+        lock.release()
+        if not future.cancelled():
+            future.exception()  # retrieved, the caller may have timed out and left
+
+    def aio_close(self) -> None:
+        if getattr(self, "_executor", None) is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def aobserve_cpu_sensor(self, timeout: float = None):
+        return await self._in_executor("sysfs", self.observe_cpu_sensor, timeout)
+
+    async def aobserve_light_sensor(self, timeout: float = None):
+        return await self._in_executor("i2c", self.observe_light_sensor, timeout)
+
+    async def aobserve_humidity_sensor(self, timeout: float = None):
+        return await self._in_executor("i2c", self.observe_humidity_sensor, timeout)
+
+    async def aobserve_temperature_sensor(self, timeout: float = None):
+        return await self._in_executor("i2c", self.observe_temperature_sensor, timeout)
+
+    async def aobserve_pressure_sensor(self, timeout: float = None):
+        return await self._in_executor("i2c", self.observe_pressure_sensor, timeout)
+
+    async def aobserve_reducing_sensor(self, timeout: float = None):
+        return await self._in_executor("adc", self.observe_reducing_sensor, timeout)
+
+    async def aobserve_oxidising_sensor(self, timeout: float = None):
+        return await self._in_executor("adc", self.observe_oxidising_sensor, timeout)
+
+    async def aobserve_nh3_sensor(self, timeout: float = None):
+        return await self._in_executor("adc", self.observe_nh3_sensor, timeout)
+
+    async def aobserve_gas_sensor(self, timeout: float = None):
+        return await self._in_executor("adc", self.observe_gas_sensor, timeout)
+
+    async def aobserve_particle_sensor(self, timeout: float = None):
+        return await self._in_executor("uart", self.observe_particle_sensor, timeout)
+
+    async def aobserve_eco2_tvoc_sensor(self, timeout: float = None):
+        return await self._in_executor("i2c", self.observe_eco2_tvoc_sensor, timeout)
+
+    async def _aobserve_group(
+        self, group: str, observers: tuple, readings: tuple, timeout
+    ):
+        """Observes a group of sensors, returns (group, readings), NaN if it failed or timed out"""
+        started = []
+        try:
+            for observer in observers:
+                del started[:]
+                await self._in_executor(GROUP_BUSES[group], observer, timeout, started)
+        except Exception as error:
+            if isinstance(error, asyncio.TimeoutError) and started:
+                # the scan's own breaker never saw the call that hung, a call still
+                # waiting for a bus held by another group's is not its device's fault
+                self.breakers[GROUP_DEVICES[group]].failure(error)
+            self.logger.warning(f"{group} sensors failed: {error!r}")
+            ts = self.ts()
+            for reading in readings:
+                reading.value = float("nan")
+                reading.timestamp = ts
+        return group, list(readings)
+
+    async def astream_sensors(self, timeout: float = None):
+        """Yields (group, readings) for each enabled group of sensors as soon as it is read
+
+        Args:
+            timeout (float, optional): seconds each driver call may take. Defaults to None
+                (the timeout of its bus).
+        """
+        tasks = [
+            asyncio.ensure_future(self._aobserve_group(group, *group_of, timeout))
+            for group, group_of in self._groups().items()
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # stop reading if the consumer leaves early or is cancelled
+            for task in tasks:
+                task.cancel()
+
+    async def aobserve_sensors(self, timeout: float = None) -> list:
+        """Async observe_sensors, reads every enabled sensor concurrently and adds the row to Data
+
+        Args:
+            timeout (float, optional): seconds each driver call may take. Defaults to None
+                (the timeout of its bus).
+
+        Return
+            list: the readings, NaN for sensors that failed or timed out
+        """
+        groups = {}
+        async for group, group_readings in self.astream_sensors(timeout):
+            groups[group] = group_readings
+        # in the order of observe_sensors, not the order the groups finished in
+        readings = [
+            reading for group in GROUP_BUSES for reading in groups.get(group, ())
+        ]
+        self.Data.add_row(readings, self.ts())
+        return readings
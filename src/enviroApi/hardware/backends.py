@@ -0,0 +1,85 @@
+import time
+
+from enviroApi.hardware.simulated import SimBackend
+from enviroApi.hardware.thermal import CpuThermal
+
+
+class PiBackend:
+    """The devices of an Enviro+ on a Raspberry Pi
+
+    Details:
+        The device libraries are imported when a device is first made, not when
+        enviroApi.hardware is imported, so the package loads on any machine and only
+        the devices that are enabled need their library installed.
+    """
+
+    name = "pi"
+    pms_reader = True
+
+    def time_ns(self) -> int:
+        """Returns the time readings are stamped with, in ns since the epoch"""
+        return time.time_ns()
+
+    def bme280(self):
+        from bme280 import BME280
+        from smbus2 import SMBus
+
+        return BME280(i2c_dev=SMBus(1))
+
+    def ltr559(self):
+        from ltr559 import LTR559
+
+        return LTR559()
+
+    def pms5003(self):
+        from pms5003 import PMS5003
+
+        return PMS5003()
+
+    def pms5003_port(self, device):
+        """Returns the UART of a PMS5003, for PMSReader to parse the frames itself"""
+        return device._serial
+
+    def sgp30(self):
+        from sgp30 import SGP30
+
+        return SGP30()
+
+    def gas(self):
+        from enviroplus import gas
+
+        return gas
+
+    def cpu_thermal(self, path: str = None) -> CpuThermal:
+        return CpuThermal(path)
+
+    def display(self, **kwargs):
+        from st7735 import ST7735
+
+        return ST7735(**kwargs)
+
+    @property
+    def pms_errors(self) -> tuple:
+        """Errors a PMS5003 read raises when a frame is lost"""
+        from pms5003 import ChecksumMismatchError, ReadTimeoutError
+
+        return ReadTimeoutError, ChecksumMismatchError
+
+
+BACKENDS = {"pi": PiBackend, "sim": SimBackend}
+
+
+def get_backend(backend=None):
+    """Returns a hardware backend
+
+    Args:
+        backend (str, object, optional): "pi", "sim", or a backend object, which is returned
+            as is. Defaults to None ("pi").
+    """
+    if backend is None:
+        backend = "pi"
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {tuple(BACKENDS)}")
+        return BACKENDS[backend]()
+    return backend
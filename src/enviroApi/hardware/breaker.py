@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+@dataclass
+class Health:
+    """Dataclass to hold the health of a device, as seen by its CircuitBreaker
+    init:
+        name (str): name of the device
+        state (str): closed (reads go through), open (reads are skipped) or half-open
+            (one probe read is going through)
+        reads (int): reads that went to the device
+        failures (int): reads that failed
+        consecutive (int): failures since the last good read
+        skipped (int): reads skipped while open
+        trips (int): times the breaker opened since the last good read
+        retry_in (float): seconds until the next probe, 0 unless open
+        last_error (str): repr of the last error, None if there was none
+    Returns:
+        None
+    """
+
+    name: str
+    state: str
+    reads: int
+    failures: int
+    consecutive: int
+    skipped: int
+    trips: int
+    retry_in: float
+    last_error: str
+
+
+class CircuitBreaker:
+    """Stops reading a device that keeps failing, probing it with exponential backoff
+
+    init:
+        name (str): name of the device
+        threshold (int): failures in a row that open the breaker. Defaults to 3.
+        base_delay (float): seconds open before the first probe. Defaults to 5.0.
+        max_delay (float): longest seconds open between probes. Defaults to 300.0.
+        factor (float): growth of the delay per failed probe. Defaults to 2.0.
+        clock (callable): returns the time in seconds. Defaults to time.monotonic.
+    Details:
+        Closed, every read goes to the device. After threshold failures in a row the
+        breaker opens and allow returns False, so a dead device costs a lock and a
+        clock read per tick instead of a blocking read and its timeout. Once the delay
+        is up the breaker is half-open and lets a single read through as a probe: if
+        it succeeds the breaker closes, if it fails it opens again for factor times as
+        long, up to max_delay.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int = 3,
+        base_delay: float = 5.0,
+        max_delay: float = 300.0,
+        factor: float = 2.0,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.clock = clock
+        self.state = CLOSED
+        self.reads = 0
+        self.failures = 0
+        self.consecutive = 0
+        self.skipped = 0
+        self.trips = 0
+        self.last_error = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns whether a read may go to the device, counting it if so"""
+        with self._lock:
+            if self.state == OPEN and self.clock() >= self._retry_at:
+                self.state = HALF_OPEN
+            elif self.state != CLOSED:
+                # open, or half-open with the probe still out
+                self.skipped += 1
+                return False
+            self.reads += 1
+            return True
+
+    def success(self, failures: int = None) -> None:
+        """Records a good read
+
+        Args:
+            failures (int, optional): self.failures when the read started, the read is
+                then ignored if a failure was recorded while it was out, e.g. its bus
+                timed out and counted it failed before it returned. Defaults to None.
+        """
+        with self._lock:
+            if failures is not None and failures != self.failures:
+                return
+            self.state = CLOSED
+            self.consecutive = 0
+            self.trips = 0
+
+    def failure(self, error: Exception = None) -> bool:
+        """Records a failed read, returns True if it opened the breaker"""
+        with self._lock:
+            self.failures += 1
+            self.consecutive += 1
+            self.last_error = None if error is None else repr(error)
+            if self.state == HALF_OPEN or self.consecutive >= self.threshold:
+                delay = min(self.base_delay * self.factor**self.trips, self.max_delay)
+                self.trips += 1
+                self.state = OPEN
+                self._retry_at = self.clock() + delay
+                return True
+            return False
+
+    def health(self) -> Health:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == OPEN:
+                retry_in = max(self._retry_at - self.clock(), 0.0)
+            return Health(
+                self.name,
+                self.state,
+                self.reads,
+                self.failures,
+                self.consecutive,
+                self.skipped,
+                self.trips,
+                retry_in,
+                self.last_error,
+            )
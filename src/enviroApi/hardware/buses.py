@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import threading
+import time
+
+# seconds a bus gets to finish its scans in one tick, the PMS5003 blocks on its UART
+# until a frame arrives (about once a second) so it gets longer
+BUS_TIMEOUTS = {"sysfs": 0.5, "i2c": 0.5, "adc": 0.5, "uart": 2.5}
+
+
+class BusBusyError(RuntimeError):
+    """The bus is still running an earlier scan, so this one was not started"""
+
+
+class Bus:
+    """A worker thread that owns one hardware bus
+
+    init:
+        name (str): name of the bus, e.g. "i2c"
+        timeout (float): seconds the scans of one tick may take
+        metrics (DeviceMetrics, optional): records how long each tick's scans take.
+            Defaults to None.
+    Details:
+        Scans on the same bus run one after the other on its thread, since the devices
+        share the wires, while scans on different buses run at the same time. A scan
+        that overruns keeps the thread, and the bus refuses new work until it returns
+        rather than queueing ticks behind it. cancel stops the scans of the tick that
+        have not started yet, the running one cannot be interrupted.
+    """
+
+    def __init__(self, name: str, timeout: float, metrics=None):
+        self.name = name
+        self.timeout = timeout
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"bus-{name}"
+        )
+        self._pending = None
+        self._cancelled = threading.Event()
+
+    @property
+    def busy(self) -> bool:
+        return self._pending is not None and not self._pending.done()
+
+    def submit(self, scans: list, errors: list):
+        """Runs scans in order on the bus' thread
+
+        Args:
+            scans (list): callables to run
+            errors (list): filled in as the scans finish, None for each scan that worked
+                and the exception raised by each one that failed
+
+        Returns:
+            Future: done when every scan has run, None if the bus is busy
+        """
+        if self.busy:
+            return None
+        # a flag per submission, so cancelling one cannot reach the next
+        self._cancelled = threading.Event()
+        self._pending = self._executor.submit(
+            _run, scans, errors, self._cancelled, self.metrics
+        )
+        return self._pending
+
+    def cancel(self) -> None:
+        """Skips the scans of the last submission that have not started yet"""
+        self._cancelled.set()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def _run(scans: list, errors: list, cancelled: threading.Event, metrics=None) -> None:
+    started = time.perf_counter_ns()
+    for scan in scans:
+        if cancelled.is_set():
+            break
+        try:
+            scan()
+        except Exception as error:
+            errors.append(error)
+        else:
+            errors.append(None)
+    if metrics is not None:
+        metrics.record(time.perf_counter_ns() - started, not any(errors))
+
+
+class BusPool:
+    """One Bus per name, scanned concurrently
+
+    init:
+        timeouts (dict, optional): seconds per bus, missing buses use BUS_TIMEOUTS.
+            Defaults to None.
+        metrics (Metrics, optional): records each bus' tick times, timeouts and busy
+            ticks. Defaults to None.
+    Details:
+        run starts every bus at once and waits for each up to its own timeout, counted
+        from the same start, so a tick takes as long as the slowest bus rather than the
+        sum of every device on every bus.
+    """
+
+    def __init__(self, timeouts: dict = None, metrics=None):
+        self.timeouts = {**BUS_TIMEOUTS, **(timeouts or {})}
+        self.metrics = metrics
+        self.buses = {}
+
+    def bus(self, name: str) -> Bus:
+        if name not in self.buses:
+            self.buses[name] = Bus(
+                name,
+                self.timeouts.get(name, max(BUS_TIMEOUTS.values())),
+                None if self.metrics is None else self.metrics.bus(name),
+            )
+        return self.buses[name]
+
+    def run(self, scans: dict) -> dict:
+        """Runs the scans of every bus concurrently
+
+        Args:
+            scans (dict): bus name to the list of scans (callables) to run on it, in order
+
+        Returns:
+            dict: bus name to a list with, for each scan, None if it worked or the exception
+                it raised, TimeoutError for the scan that was running when the bus' timeout
+                ran out and BusBusyError for the scans after it, which are not run, or for
+                all of them if the bus was still busy from an earlier run
+        """
+        started = time.monotonic()
+        results = {name: [] for name in scans}
+        futures = {
+            name: self.bus(name).submit(jobs, results[name])
+            for name, jobs in scans.items()
+        }
+        for name, future in futures.items():
+            jobs = scans[name]
+            if future is None:
+                results[name] = [BusBusyError(name)] * len(jobs)
+                if self.metrics is not None:
+                    self.metrics.bus(name).skip()
+                continue
+            remaining = started + self.buses[name].timeout - time.monotonic()
+            try:
+                future.result(timeout=max(remaining, 0))
+            except TimeoutError:
+                # cancel first, so no scan starts after the results are fixed
+                self.buses[name].cancel()
+                # keep what finished, the worker may still append to the old list
+                done = list(results[name])
+                results[name] = (
+                    done
+                    + [TimeoutError(name)]
+                    + [BusBusyError(name)] * (len(jobs) - len(done) - 1)
+                )
+                if self.metrics is not None:
+                    self.metrics.bus(name).error()
+        return results
+
+    def close(self) -> None:
+        for bus in self.buses.values():
+            bus.close()
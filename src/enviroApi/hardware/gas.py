@@ -0,0 +1,47 @@
+import threading
+import time
+
+
+class GasReader:
+    """One ADC read of the MICS6814 gas sensor shared by every channel and consumer
+
+    init:
+        source (module): provides read_all(), e.g. enviroplus.gas
+        max_age (float): seconds a read stays fresh, reads within it return the cached
+            result. Defaults to 0.5.
+        clock (callable): returns the time in seconds. Defaults to time.monotonic.
+    Details:
+        read_all samples the reducing, oxidising and nh3 channels of the ADS1015 in one
+        go, so reading each channel through its own read_all costs three full reads.
+        read returns the last result while it is younger than max_age and only goes
+        to the ADC once it is stale, under a lock so that consumers on other threads
+        wait for the read in progress rather than starting their own.
+    """
+
+    def __init__(self, source, max_age: float = 0.5, clock=time.monotonic):
+        self.source = source
+        self.max_age = max_age
+        self.clock = clock
+        self.reads = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._data = None
+        self._read_at = None
+
+    def read(self):
+        """Returns the gas readings (with reducing, oxidising and nh3 in Ohms), reading the ADC if the cache is stale"""
+        with self._lock:
+            now = self.clock()
+            # a clock stepped backwards counts as stale, rather than holding the cache
+            if self._read_at is not None and 0 <= now - self._read_at < self.max_age:
+                self.hits += 1
+                return self._data
+            self._data = self.source.read_all()
+            self._read_at = now
+            self.reads += 1
+            return self._data
+
+    def invalidate(self) -> None:
+        """Makes the next read go to the ADC"""
+        with self._lock:
+            self._read_at = None
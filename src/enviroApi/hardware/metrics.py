@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """HDR-style histogram of latencies in ns, to within 1% at any magnitude
+
+    init:
+        bits (int): bits of each value kept, values are bucketed to within 1 part in
+            2**(bits - 1). Defaults to 8 (under 1%).
+        highest (int): largest value in ns, larger ones are counted as it. Defaults to 60s.
+    Details:
+        Values below 2**bits get a bucket each. Above, each power of two is split into
+        2**(bits - 1) equal buckets, so the bucket of a value is its top bits and its
+        bit length, found with a shift, and recording is an index into a list of
+        counts whatever the value. 60s at 8 bits is 3808 buckets.
+    """
+
+    def __init__(self, bits: int = 8, highest: int = 60_000_000_000):
+        self.bits = bits
+        self.highest = highest
+        self._half = bits - 1
+        self.counts = [0] * (self._index(highest) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = highest
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.bits
+        return value if shift <= 0 else (shift << self._half) + (value >> shift)
+
+    def _value(self, index: int) -> int:
+        """Returns the largest value in a bucket"""
+        if index < 1 << self.bits:
+            return index
+        shift = (index >> self._half) - 1
+        return ((index - (shift << self._half) + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        if value > self.highest:
+            value = self.highest
+        shift = value.bit_length() - self.bits
+        self.counts[
+            value if shift <= 0 else (shift << self._half) + (value >> shift)
+        ] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value < self.min:
+            self.min = value
+
+    def percentile(self, percent: float) -> int:
+        """Returns the value in ns that percent of the values are at or below, None if empty"""
+        if not self.count:
+            return None
+        rank = max(percent / 100 * self.count, 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        """Returns the count, and min, mean, percentiles and max in microseconds"""
+        if not self.count:
+            return {"count": 0}
+        summary = {"count": self.count, "min": self.min / 1e3, "mean": self.mean / 1e3}
+        for percent in PERCENTILES:
+            summary[f"p{percent:g}"] = self.percentile(percent) / 1e3
+        summary["max"] = self.max / 1e3
+        return summary
+
+
+class DeviceMetrics:
+    """Latencies and counts of one device or bus
+
+    Details:
+        samples are reads that worked, errors reads that failed, retries reads that
+        probed a device after a failure or resets, and skipped reads that were not
+        made, because a device's breaker was open or its bus still busy.
+        There is no lock: a device is read by one thread at a time, and were two to
+        record at the same instant the worst case is one lost count, which is cheaper
+        to accept than a lock on every read.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = LatencyHistogram()
+        self.samples = 0
+        self.errors = 0
+        self.retries = 0
+        self.skipped = 0
+
+    def record(self, ns: int, ok: bool = True) -> None:
+        """Records a read that took ns nanoseconds"""
+        self.latency.record(ns)
+        if ok:
+            self.samples += 1
+        else:
+            self.errors += 1
+
+    def error(self) -> None:
+        """Counts a failure that has no latency, like a bus timing out"""
+        self.errors += 1
+
+    def retry(self) -> None:
+        self.retries += 1
+
+    def skip(self) -> None:
+        self.skipped += 1
+
+    def to_dict(self, seconds: float) -> dict:
+        return {
+            "samples": self.samples,
+            "errors": self.errors,
+            "retries": self.retries,
+            "skipped": self.skipped,
+            "samples_per_s": self.samples / seconds if seconds > 0 else None,
+            "busy_s": self.latency.total / 1e9,
+            "latency_us": self.latency.to_dict(),
+        }
+
+
+class Metrics:
+    """Scan latencies and counts of every device and bus, queryable and dumpable as JSON
+
+    init:
+        clock (callable): returns the time in seconds, for the rates. Defaults to time.monotonic.
+    Details:
+        device(name) and bus(name) return the DeviceMetrics to record into, made on
+        first use. Recording a read is a histogram index and a few counters, about
+        0.3us, so every scan is recorded rather than a sample of them. busy_s,
+        the time spent in a device's reads, shows which one is eating the loop.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.devices = {}
+        self.buses = {}
+        self._lock = threading.Lock()
+
+    def _get(self, group: dict, name: str) -> DeviceMetrics:
+        metrics = group.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = group.setdefault(name, DeviceMetrics(name))
+        return metrics
+
+    def device(self, name: str) -> DeviceMetrics:
+        return self._get(self.devices, name)
+
+    def bus(self, name: str) -> DeviceMetrics:
+        return self._get(self.buses, name)
+
+    def reset(self) -> None:
+        """Drops everything recorded and restarts the rates"""
+        with self._lock:
+            self.devices = {}
+            self.buses = {}
+            self.started = self.clock()
+
+    def snapshot(self) -> dict:
+        """Returns the metrics of every device and bus as a dict of plain values"""
+        seconds = self.clock() - self.started
+        return {
+            "seconds": seconds,
+            "devices": {
+                name: metrics.to_dict(seconds)
+                for name, metrics in list(self.devices.items())
+            },
+            "buses": {
+                name: metrics.to_dict(seconds)
+                for name, metrics in list(self.buses.items())
+            },
+        }
+
+    def dump(self, path: str = None, indent: int = 2) -> str:
+        """Returns the snapshot as JSON, also writing it to path if given"""
+        dumped = json.dumps(self.snapshot(), indent=indent)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(dumped)
+        return dumped
@@ -0,0 +1,204 @@
+from collections import deque
+import logging
+import struct
+import threading
+import time
+
+START = b"\x42\x4d"
+DATA_LENGTH = 28
+# start of frame, data length, 13 data words, checksum of the 30 bytes before it
+FRAME = struct.Struct(">2sH13HH")
+
+
+def pack_frame(data: tuple) -> bytes:
+    """Returns the bytes of a PMS5003 frame holding 13 data words"""
+    frame = FRAME.pack(START, DATA_LENGTH, *data, 0)
+    return frame[:-2] + struct.pack(">H", sum(frame[:-2]) & 0xFFFF)
+
+
+class PMSFrame:
+    """A PMS5003 frame, read like pms5003.PMS5003Data
+
+    init:
+        data (tuple): the 13 data words, pm1, pm2.5 and pm10 in ug/m3 at CF=1, the same
+            in the atmospheric environment, then the particle counts per 0.1L of air
+    """
+
+    def __init__(self, data: tuple):
+        self.data = data
+
+    def pm_ug_per_m3(self, size: float, atmospheric_environment: bool = False) -> int:
+        sizes = {1.0: 0, 2.5: 1, 10: 2}
+        if size not in sizes:
+            raise ValueError("Particle size {} measurement not available.".format(size))
+        return self.data[sizes[size] + (3 if atmospheric_environment else 0)]
+
+    def pm_per_1l_air(self, size: float) -> int:
+        sizes = {0.3: 6, 0.5: 7, 1.0: 8, 2.5: 9, 5: 10, 10: 11}
+        if size not in sizes:
+            raise ValueError("Particle size {} measurement not available.".format(size))
+        return self.data[sizes[size]]
+
+
+class FrameParser:
+    """Splits a PMS5003 byte stream into frames, resyncing on the start bytes
+
+    Details:
+        feed takes whatever the UART returned and keeps the bytes of an unfinished
+        frame for the next call. A frame starts with 0x42 0x4d and a data length of 28,
+        and is only accepted if its checksum matches. On a bad length or checksum the
+        search for 0x42 0x4d restarts one byte on, inside the rejected frame, so that
+        a byte lost on the wire costs the one frame it was in, not the frame after it
+        too, and the sensor never needs a reset to find its place again.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.bad_checksums = 0
+        self.skipped = 0  # bytes dropped looking for a frame
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list:
+        """Returns the PMSFrames completed by a chunk of bytes"""
+        buffer = self._buffer
+        buffer += chunk
+        frames = []
+        while True:
+            start = buffer.find(START)
+            if start < 0:
+                # keep a trailing 0x42, it may be the first half of a start
+                keep = 1 if buffer[-1:] == START[:1] else 0
+                self.skipped += len(buffer) - keep
+                del buffer[: len(buffer) - keep]
+                return frames
+            if start:
+                self.skipped += start
+                del buffer[:start]
+            if len(buffer) < FRAME.size:
+                return frames
+            _, length, *data, checksum = FRAME.unpack_from(buffer)
+            if length != DATA_LENGTH or checksum != sum(buffer[: FRAME.size - 2]):
+                self.bad_checksums += 1
+                self.skipped += 1
+                del buffer[:1]
+                continue
+            del buffer[: FRAME.size]
+            self.frames += 1
+            frames.append(PMSFrame(tuple(data)))
+
+
+class PMSReader:
+    """Reads PMS5003 frames on a thread of its own, keeping the latest in a ring buffer
+
+    init:
+        device (PMS5003): the particle sensor
+        errors (tuple): errors a read raises when a frame is lost, see the backend's pms_errors
+        port (serial.Serial, optional): the sensor's UART, read and parsed by FrameParser.
+            Defaults to None (frames come from device.read()).
+        size (int): frames kept. Defaults to 16.
+        max_age (float): seconds a frame is served for, older frames read as missing.
+            Defaults to 5.0.
+        reset_after (int): failed reads in a row before the sensor is reset. Defaults to 10.
+        clock (callable): returns the time frames are stamped with in ns. Defaults to time.time_ns.
+        log (logging, optional): logger. Defaults to the module logger.
+    Details:
+        The PMS5003 pushes a frame about every second whether or not it is read, so
+        reading it on demand means either waiting for the next frame or reading a
+        stale one out of the UART's buffer. The reader thread consumes the UART
+        continuously instead, and latest returns the newest good frame without
+        touching the sensor. Bad frames are skipped by resyncing on the next start
+        bytes, the sensor is only reset once reset_after reads in a row have failed.
+    """
+
+    def __init__(
+        self,
+        device,
+        errors: tuple,
+        port=None,
+        size: int = 16,
+        max_age: float = 5.0,
+        reset_after: int = 10,
+        clock=time.time_ns,
+        log: logging = None,
+    ):
+        self.device = device
+        self.errors = errors
+        self.port = port
+        self.max_age = max_age
+        self.reset_after = reset_after
+        self.clock = clock
+        self.logger = logging.getLogger(__name__) if log is None else log
+        self.parser = FrameParser()
+        self.failures = 0
+        self.resets = 0
+        self._frames = deque(maxlen=size)  # (timestamp, PMSFrame)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._failed = 0  # failed reads in a row
+
+    def start(self) -> threading.Thread:
+        """Starts reading on a daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="pms5003", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops the thread, waiting up to timeout seconds for the read in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                frames = self._read()
+            except self.errors:
+                frames = []
+            except Exception as error:
+                self.logger.warning(f"PMS5003 read failed: {error!r}")
+                self._stop.wait(1.0)
+                frames = []
+            self._received(frames)
+
+    def _read(self) -> list:
+        if self.port is None:
+            return [self.device.read()]
+        return self.parser.feed(self.port.read(FRAME.size))
+
+    def _received(self, frames: list) -> None:
+        if not frames:
+            self.failures += 1
+            self._failed += 1
+            if self._failed >= self.reset_after:
+                self.logger.warning(
+                    f"no PMS5003 frame in {self._failed} reads, resetting"
+                )
+                self._failed = 0
+                self.resets += 1
+                try:
+                    self.device.reset()
+                except Exception as error:
+                    self.logger.warning(f"PMS5003 reset failed: {error!r}")
+            return
+        self._failed = 0
+        ts = self.clock()
+        with self._lock:
+            self._frames.extend((ts, frame) for frame in frames)
+
+    def latest(self) -> tuple:
+        """Returns (timestamp in ns, PMSFrame) of the newest frame, None if there is none within max_age"""
+        with self._lock:
+            if not self._frames:
+                return None
+            ts, frame = self._frames[-1]
+        if self.clock() - ts > self.max_age * 1e9:
+            return None
+        return ts, frame
+
+    def frames(self) -> list:
+        """Returns the (timestamp in ns, PMSFrame) kept, oldest first"""
+        with self._lock:
+            return list(self._frames)
@@ -0,0 +1,384 @@
+from collections import deque
+import struct
+import threading
+import time
+
+from enviroApi.hardware.simulated import (
+    ChecksumMismatchError,
+    ReadTimeoutError,
+    SimGasData,
+    SimPMS5003Data,
+    SimST7735,
+)
+
+MAGIC = b"ENVR"
+VERSION = 2
+FILE_HEADER = struct.Struct("<4sBB")  # magic, version, flags
+# flag: the PMS5003 was read by a PMSReader thread, not by the scans
+PMS_READER = 1
+# timestamp in ns, method, status, number of values, then that many float64
+RECORD = struct.Struct("<qBBB")
+
+# device reads that are recorded, in the order of their ids in the file
+METHODS = (
+    ("bme280", "get_temperature"),
+    ("bme280", "get_pressure"),
+    ("bme280", "get_humidity"),
+    ("ltr559", "get_lux"),
+    ("ltr559", "get_proximity"),
+    ("pms5003", "read"),
+    ("sgp30", "command"),
+    ("gas", "read_all"),
+    ("cpu", "read"),
+)
+METHOD_IDS = {method: i for i, method in enumerate(METHODS)}
+
+OK, READ_TIMEOUT, CHECKSUM, OS_ERROR, TIMEOUT = range(5)
+ERRORS = {
+    READ_TIMEOUT: ReadTimeoutError,
+    CHECKSUM: ChecksumMismatchError,
+    OS_ERROR: OSError,
+    TIMEOUT: TimeoutError,
+}
+
+
+def _encode(device: str, result) -> tuple:
+    """Returns the floats a device read is stored as"""
+    if device == "pms5003":
+        return tuple(result.pm_ug_per_m3(size) for size in (1.0, 2.5, 10))
+    if device == "gas":
+        return result.oxidising, result.reducing, result.nh3
+    if device == "sgp30":
+        return tuple(result)
+    return (result,)
+
+
+def _decode(device: str, values: tuple):
+    """Returns the result of a device read from its stored floats"""
+    if device == "pms5003":
+        return SimPMS5003Data(*values)
+    if device == "gas":
+        return SimGasData(*values)
+    if device == "sgp30":
+        return [int(value) for value in values]
+    return values[0]
+
+
+def _status(error: Exception) -> int:
+    name = type(error).__name__
+    if name == "ReadTimeoutError":
+        return READ_TIMEOUT
+    if name == "ChecksumMismatchError":
+        return CHECKSUM
+    if isinstance(error, TimeoutError):
+        return TIMEOUT
+    return OS_ERROR
+
+
+class Recorder:
+    """Writes device reads to a binary stream file
+
+    init:
+        path (str): file to write, an existing file is replaced
+        pms_reader (bool): whether the PMS5003 reads come from a PMSReader thread,
+            kept in the file header for the replay. Defaults to False.
+    Details:
+        Each read is one record: its timestamp in ns, which device method it was, whether
+        it failed and how, and its result as float64s, 12 bytes plus 8 per value. Reads
+        from the bus threads are serialized by a lock.
+    """
+
+    def __init__(self, path: str, pms_reader: bool = False):
+        self._file = open(path, "wb")
+        self._file.write(
+            FILE_HEADER.pack(MAGIC, VERSION, PMS_READER if pms_reader else 0)
+        )
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def write(self, timestamp: int, method: tuple, status: int, values: tuple) -> None:
+        record = RECORD.pack(timestamp, METHOD_IDS[method], status, len(values))
+        record += struct.pack(f"<{len(values)}d", *values)
+        with self._lock:
+            self._file.write(record)
+            self.records += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _RecordedDevice:
+    """Passes calls through to a device, recording the reads in METHODS"""
+
+    def __init__(self, device, name: str, recorder: Recorder, clock):
+        self._device = device
+        self._name = name
+        self._recorder = recorder
+        self._clock = clock
+
+    def __getattr__(self, attribute: str):
+        value = getattr(self._device, attribute)
+        method = (self._name, attribute)
+        if method not in METHOD_IDS:
+            return value
+
+        def record(*args, **kwargs):
+            try:
+                result = value(*args, **kwargs)
+            except Exception as error:
+                self._recorder.write(self._clock(), method, _status(error), ())
+                raise
+            if self._name == "sgp30" and args and args[0] != "measure_air_quality":
+                return result  # only air quality measurements are replayed
+            self._recorder.write(self._clock(), method, OK, _encode(self._name, result))
+            return result
+
+        return record
+
+
+class RecordingBackend:
+    """Wraps another backend, recording every device read to a file for ReplayBackend
+
+    init:
+        backend (object): backend to record, e.g. PiBackend()
+        path (str): file to write
+        pms_reader (bool, optional): whether Sensors reads the PMS5003 on a PMSReader
+            thread, leave Sensors' pms_reader at None so they agree. Defaults to None
+            (the backend's pms_reader).
+    Details:
+        Whether a PMSReader is used goes into the file header, so the replay reads
+        the recorded frames through one too.
+    """
+
+    def __init__(self, backend, path: str, pms_reader: bool = None):
+        self.backend = backend
+        self.name = f"recording {backend.name}"
+        if pms_reader is None:
+            pms_reader = getattr(backend, "pms_reader", False)
+        self.pms_reader = pms_reader
+        self.recorder = Recorder(path, pms_reader)
+
+    @property
+    def pms_errors(self) -> tuple:
+        return self.backend.pms_errors
+
+    def time_ns(self) -> int:
+        return self.backend.time_ns()
+
+    def _wrap(self, device, name: str):
+        return _RecordedDevice(device, name, self.recorder, self.backend.time_ns)
+
+    def bme280(self):
+        return self._wrap(self.backend.bme280(), "bme280")
+
+    def ltr559(self):
+        return self._wrap(self.backend.ltr559(), "ltr559")
+
+    def pms5003(self):
+        return self._wrap(self.backend.pms5003(), "pms5003")
+
+    def sgp30(self):
+        return self._wrap(self.backend.sgp30(), "sgp30")
+
+    def gas(self):
+        return self._wrap(self.backend.gas(), "gas")
+
+    def cpu_thermal(self, path: str = None):
+        return self._wrap(self.backend.cpu_thermal(path), "cpu")
+
+    def display(self, **kwargs):
+        return self.backend.display(**kwargs)
+
+    def close(self) -> None:
+        self.recorder.close()
+
+
+class ReplayBackend:
+    """Devices that return the reads of a recording, paced by their timestamps
+
+    init:
+        path (str): file written by RecordingBackend
+        speed (float, optional): playback speed, 1 for real time, N for N times faster,
+            None to replay as fast as the pipeline reads. Defaults to 1.
+        clock (callable): returns the time in seconds. Defaults to time.monotonic.
+        sleep (callable): waits a number of seconds. Defaults to time.sleep.
+    Details:
+        Each device method returns its recorded reads in order, raising the recorded
+        errors, and a read waits until its recorded time comes round at the given speed.
+        The file is read as the devices ask for records, so memory does not grow with
+        the length of the recording. time_ns returns the timestamp of the latest read
+        served, so Sensors stamps the readings with the recorded times. Once a method
+        runs out of records it raises EOFError and done is True.
+        Gas reads are recorded below Sensors' GasReader, so the replay turns that cache
+        off and serves each ADC read once, as the recording's ticks saw it as long as
+        they were further apart than its gas_max_age.
+        pms_reader is taken from the recording, so PMS5003 frames a PMSReader thread
+        read are replayed to one, leave Sensors' pms_reader at None. Without a speed
+        the thread is kept in step with the scans by the order of the file, see
+        _hand_over, rather than draining every frame up front.
+    """
+
+    name = "replay"
+    pms_errors = (ReadTimeoutError, ChecksumMismatchError)
+    # every recorded gas read is served once, Sensors' cache already decided which
+    gas_max_age = 0
+
+    def __init__(
+        self, path: str, speed: float = 1, clock=time.monotonic, sleep=time.sleep
+    ):
+        self.speed = speed
+        self.clock = clock
+        self.sleep = sleep
+        self.done = False
+        self.records = 0
+        self._file = open(path, "rb")
+        magic, version, flags = FILE_HEADER.unpack(self._file.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+        self.pms_reader = bool(flags & PMS_READER)
+        self._queues = {method: deque() for method in METHODS}
+        self._lock = threading.Lock()
+        # notified as reads move on, see _hand_over
+        self._served = threading.Condition(self._lock)
+        self._parsed = 0  # records of devices other than the PMS5003 read from the file
+        self._scanned = 0  # of those, served to the scans
+        self._frame_after = None  # _parsed when the frame the PMSReader is held at was
+        self._reading = False  # whether a PMSReader has asked for a frame
+        self._first = None
+        self._started = None
+        self._latest = None
+
+    def _next(self, method: tuple) -> tuple:
+        """Returns the next (timestamp, status, values, number of records of the other
+        devices before it) of a method, reading ahead as needed
+        """
+        with self._lock:
+            queue = self._queues[method]
+            while not queue:
+                header = self._file.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    self.done = True
+                    self._served.notify_all()
+                    raise EOFError(f"no more {method[0]} {method[1]} records")
+                timestamp, method_id, status, count = RECORD.unpack(header)
+                values = struct.unpack(f"<{count}d", self._file.read(8 * count))
+                self._queues[METHODS[method_id]].append(
+                    (timestamp, status, values, self._parsed)
+                )
+                if METHODS[method_id][0] != "pms5003":
+                    self._parsed += 1
+            record = queue.popleft()
+            if self._first is None:
+                self._first = record[0]
+                self._started = self.clock()
+            self.records += 1
+            return record
+
+    def read(self, device: str, method: str):
+        """Returns, or raises, the next recorded read of a device method"""
+        timestamp, status, values, before = self._next((device, method))
+        if self.speed:
+            wait = (timestamp - self._first) / 1e9 / self.speed - (
+                self.clock() - self._started
+            )
+            if wait > 0:
+                self.sleep(wait)
+        elif self.pms_reader:
+            self._hand_over(device, before)
+        self._latest = timestamp
+        if status != OK:
+            raise ERRORS[status](f"recorded {device} {method} failure")
+        return _decode(device, values)
+
+    def _hand_over(self, device: str, before: int) -> None:
+        """Keeps the PMSReader thread in step with the scans, when there is no speed
+
+        Args:
+            device (str): device read
+            before (int): records of the other devices in the file before this one
+
+        Details:
+            Frames are handed to the thread in file order: the thread is held at each
+            frame until the scans have been served every record written before it, and
+            a scan's read returns once the thread is held at a frame written after the
+            next record, so a tick's particle scan, running alongside the other buses,
+            finds the frames the recording's tick did unless its bus ran late. Scans
+            only wait once a PMSReader has asked for a frame.
+        """
+        with self._served:
+            if device == "pms5003":
+                self._reading = True
+                self._frame_after = before
+                self._served.notify_all()
+                self._served.wait_for(lambda: self.done or self._scanned >= before)
+                self._frame_after = None
+            else:
+                self._scanned += 1
+                self._served.notify_all()
+                if not self._reading:
+                    return
+                self._served.wait_for(
+                    lambda: self.done
+                    or (
+                        self._frame_after is not None
+                        and self._frame_after > self._scanned
+                    ),
+                    timeout=1.0,
+                )
+
+    def time_ns(self) -> int:
+        return time.time_ns() if self._latest is None else self._latest
+
+    def bme280(self):
+        return _ReplayDevice(self, "bme280")
+
+    def ltr559(self):
+        return _ReplayDevice(self, "ltr559")
+
+    def pms5003(self):
+        return _ReplayDevice(self, "pms5003")
+
+    def sgp30(self):
+        return _ReplayDevice(self, "sgp30")
+
+    def gas(self):
+        return _ReplayDevice(self, "gas")
+
+    def cpu_thermal(self, path: str = None):
+        return _ReplayDevice(self, "cpu")
+
+    def display(self, **kwargs):
+        return SimST7735(**kwargs)
+
+    def close(self) -> None:
+        with self._served:
+            self.done = True
+            self._served.notify_all()
+        self._file.close()
+
+
+class _ReplayDevice:
+    """A device of a ReplayBackend, methods in METHODS return the recorded reads"""
+
+    def __init__(self, backend: ReplayBackend, name: str):
+        self._backend = backend
+        self._name = name
+
+    def __getattr__(self, attribute: str):
+        if (self._name, attribute) not in METHOD_IDS:
+            # reset, start_measurement, close... have nothing to replay
+            return lambda *args, **kwargs: None
+
+        def replay(*args, **kwargs):
+            if self._name == "sgp30" and args and args[0] != "measure_air_quality":
+                return []
+            return self._backend.read(self._name, attribute)
+
+        return replay
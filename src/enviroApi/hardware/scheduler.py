@@ -0,0 +1,201 @@
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+@dataclass
+class Task:
+    """Dataclass to hold a periodic task of a Scheduler
+    init:
+        name (str): name of the task
+        action (callable): called with no arguments each time the task is due
+        period (float): seconds between runs
+        jitter (float): seconds the task may run early, so that tasks due close
+            together share one wake up
+        deadline (float): next time the task is due, on the scheduler's clock
+        runs (int): number of times the task has run
+        missed (int): number of runs skipped because an earlier one overran
+        late (float): worst lateness seen, in seconds
+    Returns:
+        None
+    """
+
+    name: str
+    action: object
+    period: float
+    jitter: float = 0.0
+    deadline: float = 0.0
+    runs: int = 0
+    missed: int = 0
+    late: float = 0.0
+    cancelled: bool = field(default=False, repr=False)
+
+
+class Scheduler:
+    """Runs periodic tasks from a heap of deadlines, sleeping until the next one is due
+
+    init:
+        clock (callable): returns the time in seconds. Defaults to time.monotonic.
+        log (logging, optional): logger for tasks that raise. Defaults to the module logger.
+    Details:
+        Tasks are kept in a heap ordered by deadline, so finding the next one is O(1)
+        and rescheduling O(log n). The thread running run() sleeps until the earliest
+        deadline instead of polling, which keeps the cpu, and with it the BME280 on top
+        of it, cooler. On waking, every task within its jitter of being due runs in the
+        same pass, and actions added with on_pass run once after them, e.g. to act on
+        everything the pass did at once. Deadlines advance by whole periods from the
+        previous deadline, so a task does not drift, and runs missed while an action
+        overran are skipped rather than run back to back.
+    """
+
+    def __init__(self, clock=time.monotonic, log: logging = None):
+        self.clock = clock
+        self.logger = logging.getLogger(__name__) if log is None else log
+        self.tasks = {}
+        self._passes = []
+        self._heap = []  # (deadline, order added, task)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+
+    def add(
+        self,
+        name: str,
+        action,
+        period: float,
+        jitter: float = 0.0,
+        delay: float = 0.0,
+    ) -> Task:
+        """Adds a periodic task, replacing any task of the same name
+
+        Args:
+            name (str): name of the task
+            action (callable): called with no arguments each time the task is due
+            period (float): seconds between runs
+            jitter (float, optional): seconds the task may run early. Defaults to 0.0.
+            delay (float, optional): seconds until the first run. Defaults to 0.0 (now).
+
+        Returns:
+            Task: the task, which keeps its run counts
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        task = Task(name, action, period, jitter, self.clock() + delay)
+        with self._lock:
+            self._remove(name)
+            self.tasks[name] = task
+            heapq.heappush(self._heap, (task.deadline, next(self._order), task))
+        self._wake.set()
+        return task
+
+    def remove(self, name: str) -> None:
+        """Removes a task, it is dropped from the heap when it next comes up"""
+        with self._lock:
+            self._remove(name)
+
+    def _remove(self, name: str) -> None:
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.cancelled = True
+
+    def on_pass(self, action) -> None:
+        """Adds an action called with no arguments after each pass that ran a task"""
+        self._passes.append(action)
+
+    def set_period(self, name: str, period: float) -> None:
+        """Changes the period of a task, taking effect when its next deadline is set
+
+        Details:
+            Deadlines are set at the end of each pass, so called from the task's own
+            action or an on_pass action the new period already spaces the next run,
+            which is how an action adapts its own rate. Called from elsewhere, the run
+            already scheduled keeps its time.
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        with self._lock:
+            task = self.tasks.get(name)
+            if task is not None:
+                task.period = period
+
+    def next_deadline(self) -> float:
+        """Returns the earliest deadline, None if there are no tasks"""
+        with self._lock:
+            return self._peek()[0]
+
+    def _peek(self) -> tuple:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return (self._heap[0][0], self._heap[0][2]) if self._heap else (None, None)
+
+    def _pop_due(self, now: float) -> tuple:
+        """Pops the next task within its jitter of now, returns (deadline, task) or (None, None)"""
+        with self._lock:
+            deadline, task = self._peek()
+            if deadline is None or deadline > now + task.jitter:
+                return None, None
+            heapq.heappop(self._heap)
+            return deadline, task
+
+    def run_pending(self) -> int:
+        """Runs every task that is due, or within its jitter of being due
+
+        Returns:
+            int: number of tasks run
+        """
+        now = self.clock()
+        ran = []
+        while True:
+            deadline, task = self._pop_due(now)
+            if task is None:
+                break
+            try:
+                task.action()
+            except Exception:
+                self.logger.exception(f"scheduled task {task.name} failed")
+            task.runs += 1
+            task.late = max(task.late, now - deadline)
+            ran.append((deadline, task))
+        if ran:
+            for action in self._passes:
+                try:
+                    action()
+                except Exception:
+                    self.logger.exception("scheduler pass action failed")
+        finished = self.clock()
+        for deadline, task in ran:
+            deadline += task.period
+            if deadline <= finished:
+                skipped = int((finished - deadline) // task.period) + 1
+                task.missed += skipped
+                deadline += skipped * task.period
+            task.deadline = deadline
+            with self._lock:
+                if not task.cancelled:
+                    heapq.heappush(self._heap, (deadline, next(self._order), task))
+        return len(ran)
+
+    def run(self) -> None:
+        """Runs tasks as they come due until stop is called, sleeping in between"""
+        self._running = True
+        while self._running:
+            self.run_pending()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(deadline - self.clock(), 0)
+            # adding a task or stopping sets the event and cuts the sleep short
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self) -> threading.Thread:
+        """Runs the scheduler on a daemon thread"""
+        thread = threading.Thread(target=self.run, name="scheduler", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self._running = False
+        self._wake.set()
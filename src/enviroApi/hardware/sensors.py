@@ -1,32 +1,152 @@
-from sgp30 import SGP30
-from smbus2 import SMBus
-from ltr559 import LTR559
-from enviroplus import gas
-from bme280 import BME280
-from pms5003 import PMS5003, ReadTimeoutError, ChecksumMismatchError
 from enviroApi.config import Config, Variable_Units
 from enviroApi.data import SensorData, Values
+from enviroApi.hardware.adaptive import ADAPTIVE_PERIODS, AdaptiveRate
+from enviroApi.hardware.aio import GROUP_BUSES, AsyncSensors
+from enviroApi.hardware.backends import get_backend
+from enviroApi.hardware.breaker import HALF_OPEN, CircuitBreaker
+from enviroApi.hardware.buses import BusBusyError, BusPool
+from enviroApi.hardware.gas import GasReader
+from enviroApi.hardware.metrics import Metrics
+from enviroApi.hardware.pms import PMSReader
+from enviroApi.hardware.scheduler import Scheduler
+import functools
 import logging
-from subprocess import PIPE, Popen
+import time
+
+# (period, jitter) in seconds of each group of sensors, after the Northcliff monitor's
+# update intervals. The PMS5003 sends a frame about once a second and the SGP30's
+# baseline algorithm expects a measurement every second, so those get little jitter
+SAMPLE_PERIODS = {
+    "particle": (1.0, 0.2),
+    "eco2_tvoc": (1.0, 0.05),
+    "light": (1.0, 0.5),
+    "gas": (5.0, 1.0),
+    "climate": (150.0, 5.0),
+    "cpu": (150.0, 5.0),
+}
+
+# devices with a CircuitBreaker, see Sensors.health
+DEVICES = ("cpu", "bme280", "ltr559", "gas", "pms5003", "sgp30")
+
+
+def guarded(device: str, *readings: str):
+    """Decorates a scan method to go through the CircuitBreaker of its device
+
+    Args:
+        device (str): name of the device, a key of Sensors.breakers
+        *readings (str): attributes of the Values the scan updates
+
+    Details:
+        A scan that raises is logged and counted against the device, and a scan its
+        open breaker skips returns at once. Either way its readings are set to NaN,
+        so every caller, scan_sensors, the scheduler or the async methods, records
+        the outage the same way rather than each handling the error. Every scan is
+        timed into the device's metrics, see Sensors.metrics.
+    """
+
+    def decorate(scan):
+        @functools.wraps(scan)
+        def guarded_scan(self):
+            breaker = self.breakers[device]
+            metrics = self.metrics.device(device)
+            if breaker.allow():
+                if breaker.state == HALF_OPEN:
+                    metrics.retry()
+                failures = breaker.failures
+                started = time.perf_counter_ns()
+                try:
+                    scan(self)
+                except Exception as error:
+                    metrics.record(time.perf_counter_ns() - started, False)
+                    self._failed(breaker, scan.__name__, error)
+                else:
+                    metrics.record(time.perf_counter_ns() - started)
+                    breaker.success(failures)
+                    return
+            else:
+                metrics.skip()
+            ts = self.ts()
+            for name in readings:
+                reading = getattr(self, name)
+                reading.value = float("nan")
+                reading.timestamp = ts
+
+        guarded_scan.device = device
+        return guarded_scan
+
+    return decorate
+
+
+class Sensors(AsyncSensors):
+    """The sensors of an Enviro+
+
+    init:
+        config (Config): which sensors are enabled
+        log (logging): logger
+        variable_units (Variable_Units): names and units of the readings
+        SensorData (SensorData): store the readings are added to
+        bus_timeouts (dict, optional): seconds per bus, see BusPool. Defaults to None.
+        thermal_path (str, optional): cpu thermal zone file, see CpuThermal. Defaults to None.
+        gas_max_age (float): seconds a gas ADC read is shared for, see GasReader
+        backend (str, object, optional): "pi" for the real devices, "sim" or a SimBackend
+            for simulated ones, a RecordingBackend or ReplayBackend to record or replay
+            them, see enviroApi.hardware.backends. Defaults to None ("pi").
+        aio_workers (int): threads the async methods (aobserve_*) run driver calls on
+        pms_reader (bool, optional): read the PMS5003 on a thread of its own, see PMSReader.
+            Defaults to None (the backend's pms_reader, on for the Pi).
+        breaker (dict, optional): arguments of each device's CircuitBreaker, e.g.
+            {"threshold": 5}. Defaults to None.
+    Details:
+        self.metrics (Metrics) holds the scan latency histograms and the sample, error,
+        retry and skip counts of each device and bus, e.g. self.metrics.dump("m.json").
+    """
 
-
-class Sensors:
     def __init__(
         self,
         config: Config,
         log: logging,
         variable_units=Variable_Units(),
         SensorData: SensorData = SensorData(),
+        bus_timeouts: dict = None,
+        thermal_path: str = None,
+        gas_max_age: float = 0.5,
+        backend=None,
+        aio_workers: int = 4,
+        pms_reader: bool = None,
+        breaker: dict = None,
     ):
         # Create a BME280 instance
         self.config = config
         self.logger = log
+        self.backend = get_backend(backend)
+        self.aio_workers = aio_workers
+        self.pms_threaded = pms_reader
+        self.pms_reader = None
+        self.rates = {}
+        # on the time readings are stamped with, so a replay or a simulated day backs
+        # off in its own time and trips the same way however fast it runs
+        self.breakers = {
+            device: CircuitBreaker(device, clock=self._seconds, **(breaker or {}))
+            for device in DEVICES
+        }
+        self.variable_units = variable_units
+        self.metrics = Metrics()
+        self.buses = BusPool(bus_timeouts, self.metrics)
+        self.thermal_path = thermal_path
+        self.gas_max_age = gas_max_age
         self._sensor_intilization()
         self.var_unit = variable_units
         self.Data = SensorData
 
+    def ts(self) -> int:
+        # from the backend, so replayed readings keep their recorded times
+        return self.backend.time_ns()
+
+    def _seconds(self) -> float:
+        return self.backend.time_ns() / 1e9
+
     def _sensor_intilization(self):
-        self._inable_cpu_temp()
+        self._enable_cpu_temp()
         self._enable_bme280()
         self._enable_particle_sensor()
         self._enable_light_sensor()
@@ -35,6 +155,7 @@ class Sensors:
 
     def _enable_cpu_temp(self):
         # Get the temperature of the CPU for compensation
+        self.cpu_thermal = self.backend.cpu_thermal(self.thermal_path)
         self.cpu_temp = Values(
             value=0.00,
             timestamp=self.ts(),
@@ -42,19 +163,19 @@ class Sensors:
             name="cpu" + self.variable_units.temperature,
         )
 
-    def _enable_bm280(self):
-        self.bme280 = BME280(i2c_dev=SMBus(1))
+    def _enable_bme280(self):
+        self.bme280 = self.backend.bme280()
         self.temperature = Values(
             value=0.00,
             timestamp=self.ts(),
-            unit=self.variable_units.temprature_unit,
-            name=self.variable_units.temprature,
+            unit=self.variable_units.temperature_unit,
+            name=self.variable_units.temperature,
         )
-        self.humidiity = Values(
+        self.humidity = Values(
             value=0.00,
             timestamp=self.ts(),
-            unit=self.variable_units.humidiity_unit,
-            name=self.variable_units.humidiity,
+            unit=self.variable_units.humidity_unit,
+            name=self.variable_units.humidity,
         )
         self.pressure = Values(
             value=0.00,
@@ -66,7 +187,20 @@ class Sensors:
     def _enable_particle_sensor(self):
         """Import sensor for use with the enviropi particle size seneor"""
         if self.config.enable_particle_sensor:
-            self.pms5003 = PMS5003()
+            self.pms5003 = self.backend.pms5003()
+            self.pms_errors = self.backend.pms_errors
+            if self.pms_threaded is None:
+                self.pms_threaded = getattr(self.backend, "pms_reader", False)
+            if self.pms_threaded:
+                port = getattr(self.backend, "pms5003_port", None)
+                self.pms_reader = PMSReader(
+                    self.pms5003,
+                    self.pms_errors,
+                    port=None if port is None else port(self.pms5003),
+                    clock=self.ts,
+                    log=self.logger,
+                )
+                self.pms_reader.start()
             self.pm1 = Values(
                 value=0.00,
                 timestamp=self.ts(),
@@ -88,10 +222,10 @@ class Sensors:
 
     def _enable_ec02_vox_sensor(self):
         if self.config.enable_eco2_tvoc:
-            self.spg30 = SGP30()
+            self.sgp30 = self.backend.sgp30()
             self.co2 = Values(
                 value=0.00,
-                tiemestamp=self.ts(),
+                timestamp=self.ts(),
                 unit=self.variable_units.co2_unit,
                 name=self.variable_units.co2,
             )
@@ -104,7 +238,13 @@ class Sensors:
 
     def _enable_gas_sensor(self):
         if self.config.enable_oxi_redux_nh3:
-            self.gas_sensor = gas
+            # one read_all shared by the three channels, see GasReader. A replay holds
+            # only the reads that reached the ADC, so it sets its own max age of 0
+            self.gas_sensor = GasReader(
+                self.backend.gas(),
+                getattr(self.backend, "gas_max_age", self.gas_max_age),
+                clock=self._seconds,
+            )
             self.redux = Values(
                 value=0.00,
                 timestamp=self.ts(),
@@ -125,7 +265,7 @@ class Sensors:
             )
 
     def _enable_light_sensor(self):
-        self.ltr559 = LTR559()
+        self.ltr559 = self.backend.ltr559()
         self.lux = Values(
             value=0.00,
             timestamp=self.ts(),
@@ -136,22 +276,195 @@ class Sensors:
     def _enable_sound_sensor(self):
         pass
 
-    def scan_sensors(self):
-        self.scan_cpu_sensor()
-        self.scan_temperature_sensor()
-        self.scan_pressure_sensor()
-        self.scan_humidity_sensor()
+    def _scans(self, groups=None) -> list:
+        """Returns (bus, scan, readings it updates) for every enabled sensor
+
+        Args:
+            groups (collection, optional): only the sensors of these groups, see _groups.
+                Defaults to None (every group).
+        """
+        scans = [
+            ("cpu", self.scan_cpu_sensor, (self.cpu_temp,)),
+            ("climate", self.scan_temperature_sensor, (self.temperature,)),
+            ("climate", self.scan_pressure_sensor, (self.pressure,)),
+            ("climate", self.scan_humidity_sensor, (self.humidity,)),
+        ]
         if self.config.enable_proxy_sensory:
-            self.scan_light_sensor()
+            scans += [("light", self.scan_light_sensor, (self.lux,))]
         if self.config.enable_oxi_redux_nh3:
-            self.scan_gas_sensor()
+            scans += [("gas", self.scan_gas_sensor, (self.redux, self.oxi, self.nh3))]
         if self.config.enable_particle_sensor:
-            self.scan_particle_sensor
+            scans += [
+                (
+                    "particle",
+                    self.scan_particle_sensor,
+                    (self.pm1, self.pm2_5, self.pm10),
+                )
+            ]
         if self.config.enable_eco2_tvoc:
-            self.scan_eco2_tvoc_sensor()
+            scans += [("eco2_tvoc", self.scan_eco2_tvoc_sensor, (self.co2, self.voc))]
         if self.config.enable_noise:
             # TO DO need to implement a class to connect noise sensors
             pass
+        return [
+            (GROUP_BUSES[group], scan, readings)
+            for group, scan, readings in scans
+            if groups is None or group in groups
+        ]
+
+    def scan_sensors(self):
+        """Scans every enabled sensor, each bus on its own thread
+
+        Details:
+            The BME280, LTR559 and SGP30 share the I2C bus and are scanned one after the
+            other, while the gas ADC, the PMS5003 UART and the cpu temperature are
+            scanned at the same time, so a blocking PMS5003 read no longer holds up the
+            rest. A scan that fails or overruns its bus' timeout leaves NaN readings,
+            which SensorData records as an outage.
+        """
+        self._scan(self._scans())
+
+    def _scan(self, scans: list) -> None:
+        """Runs (bus, scan, readings) scans on their buses, see scan_sensors"""
+        by_bus = {}
+        for bus, scan, _ in scans:
+            by_bus.setdefault(bus, []).append(scan)
+        errors = {bus: iter(failed) for bus, failed in self.buses.run(by_bus).items()}
+        for bus, scan, readings in scans:
+            error = next(errors[bus])
+            if error is None:
+                continue
+            if not isinstance(error, BusBusyError):
+                # the scan that hung, not the ones left queued behind it on the bus
+                self.breakers[scan.device].failure(error)
+            self.logger.warning(f"{scan.__name__} failed on the {bus} bus: {error!r}")
+            ts = self.ts()
+            for reading in readings:
+                reading.value = float("nan")
+                reading.timestamp = ts
+
+    def _failed(self, breaker: CircuitBreaker, scan: str, error: Exception) -> None:
+        if breaker.failure(error):
+            health = breaker.health()
+            self.logger.warning(
+                f"{breaker.name} failed {health.consecutive} times in a row, last with"
+                f" {error!r}, skipping it for {health.retry_in:.0f}s"
+            )
+        else:
+            self.logger.warning(f"{scan} failed: {error!r}")
+
+    def health(self) -> dict:
+        """Returns the Health of each device by name, for monitoring
+
+        Details:
+            A device is closed while it reads fine, open while its reads are skipped
+            after failing, and half-open while a probe read is out, see CircuitBreaker.
+        """
+        return {device: breaker.health() for device, breaker in self.breakers.items()}
+
+    def close(self):
+        """Stops the bus and async threads and closes the thermal zone"""
+        self.buses.close()
+        self.aio_close()
+        if self.pms_reader is not None:
+            self.pms_reader.stop()
+        self.cpu_thermal.close()
+
+    def _groups(self) -> dict:
+        """Returns (observe methods, readings they update) of each enabled group of sensors"""
+        groups = {
+            "cpu": ((self.observe_cpu_sensor,), (self.cpu_temp,)),
+            "climate": (
+                (
+                    self.observe_temperature_sensor,
+                    self.observe_pressure_sensor,
+                    self.observe_humidity_sensor,
+                ),
+                (self.temperature, self.pressure, self.humidity),
+            ),
+        }
+        if self.config.enable_proxy_sensory:
+            groups["light"] = ((self.observe_light_sensor,), (self.lux,))
+        if self.config.enable_oxi_redux_nh3:
+            groups["gas"] = (
+                (self.observe_gas_sensor,),
+                (self.redux, self.oxi, self.nh3),
+            )
+        if self.config.enable_particle_sensor:
+            groups["particle"] = (
+                (self.observe_particle_sensor,),
+                (self.pm1, self.pm2_5, self.pm10),
+            )
+        if self.config.enable_eco2_tvoc:
+            groups["eco2_tvoc"] = (
+                (self.observe_eco2_tvoc_sensor,),
+                (self.co2, self.voc),
+            )
+        return groups
+
+    def schedule(
+        self, scheduler: Scheduler = None, periods: dict = None, adaptive: bool = True
+    ) -> Scheduler:
+        """Adds a task per group of sensors to a scheduler, adding their readings to Data
+
+        Args:
+            scheduler (Scheduler, optional): scheduler to add to. Defaults to None (a new one).
+            periods (dict, optional): (period, jitter) in seconds by group, overriding
+                SAMPLE_PERIODS. Defaults to None.
+            adaptive (bool, optional): let the groups in ADAPTIVE_PERIODS speed up while
+                their readings change and slow down while they are flat, see AdaptiveRate.
+                Defaults to True.
+
+        Details:
+            Each group is read at its own rate instead of every sensor on every loop, e.g.
+            Sensors(...).schedule().run() samples until stop is called, sleeping in between.
+            The groups due in one wake up are scanned together on their buses, like
+            scan_sensors, and added to Data as one row, so a row holds every reading
+            taken at that time. The AdaptiveRate of each adaptive group is kept in
+            self.rates. A group's readings count as out after twice its slowest period
+            (with jitter), see SensorData.set_gap_after, never sooner than Data.gap_after.
+
+        Return
+            Scheduler: the scheduler
+        """
+        scheduler = Scheduler(log=self.logger) if scheduler is None else scheduler
+        periods = {**SAMPLE_PERIODS, **(periods or {})}
+        due = []  # groups whose task ran in the scheduler's current pass
+        rates = {}
+        for group, (_, readings) in self._groups().items():
+            period, jitter = periods[group]
+            slowest = period
+            if adaptive and group in ADAPTIVE_PERIODS:
+                rate = rates[group] = self.rates[group] = AdaptiveRate(
+                    period, *ADAPTIVE_PERIODS[group]
+                )
+                period = rate.period
+                slowest = max(slowest, rate.max_period)
+            scheduler.add(group, functools.partial(due.append, group), period, jitter)
+            gap_after = max(self.Data.gap_after, 2 * (slowest + jitter))
+            for reading in readings:
+                # the cpu temperature is not one of the variables Data tracks
+                if reading.name in self.Data.gaps:
+                    self.Data.set_gap_after(reading.name, gap_after)
+        scheduler.on_pass(self._observe_task(due, scheduler, rates))
+        return scheduler
+
+    def _observe_task(self, due: list, scheduler: Scheduler, rates: dict):
+        def observe():
+            if not due:
+                return
+            groups = set(due)
+            due.clear()
+            scans = self._scans(groups)
+            self._scan(scans)
+            readings = [reading for _, _, scanned in scans for reading in scanned]
+            self.Data.add_row(readings, self.ts())
+            groups_readings = self._groups()
+            for group in groups & rates.keys():
+                period = rates[group].update(groups_readings[group][1])
+                scheduler.set_period(group, period)
+
+        return observe
 
     def read_sensors(self):
         return_list = [
@@ -174,17 +487,14 @@ class Sensors:
 
     def observe_sensors(self):
         self.scan_sensors()
-        return self.read_sensors()
+        readings = self.read_sensors()
+        self.Data.add_row(readings, self.ts())
+        return readings
 
+    @guarded("cpu", "cpu_temp")
     def scan_cpu_sensor(self):
-        process = Popen(
-            ["vcgencmd", "measure_temp"], stdout=PIPE, universal_newlines=True
-        )
-        output, _error = process.communicate()
-        start_ind = output.index("=") + 1
-        end_ind = output.rindex("'")
-        self.cpu_temp.value = float(output[start_ind:end_ind])
-        self.cpu_temp.ts = self.ts()
+        self.cpu_temp.value = self.cpu_thermal.read()
+        self.cpu_temp.timestamp = self.ts()
 
     def read_cpu_sensor(self):
         return self.cpu_temp
@@ -193,20 +503,22 @@ class Sensors:
         self.scan_cpu_sensor()
         return self.read_cpu_sensor()
 
+    @guarded("ltr559", "lux")
     def scan_light_sensor(self):
         self.lux.value = self.ltr559.get_lux()
         self.lux.timestamp = self.ts()
 
-    def read_light_senor(self):
-        return (self.var_unit.light, self.lux)
+    def read_light_sensor(self):
+        return self.lux
 
     def observe_light_sensor(self):
         self.scan_light_sensor()
         return self.read_light_sensor()
 
+    @guarded("bme280", "humidity")
     def scan_humidity_sensor(self):
-        self.humiditiy.value = self.bme280.get_humidity()
-        self.humiditiy.ts = self.ts()
+        self.humidity.value = self.bme280.get_humidity()
+        self.humidity.timestamp = self.ts()
 
     def read_humiditiy_sensor(self):
         return self.humidity
@@ -215,6 +527,7 @@ class Sensors:
         self.scan_humidity_sensor()
         return self.read_humiditiy_sensor()
 
+    @guarded("bme280", "temperature")
     def scan_temperature_sensor(self):
         self.temperature.value = self.bme280.get_temperature()
         self.temperature.timestamp = self.ts()
@@ -226,9 +539,10 @@ class Sensors:
         self.scan_temperature_sensor()
         return self.read_temperature_sensor()
 
+    @guarded("bme280", "pressure")
     def scan_pressure_sensor(self):
         self.pressure.value = self.bme280.get_pressure()
-        self.pressure.ts = self.ts()
+        self.pressure.timestamp = self.ts()
 
     def read_pressure_sensor(self):
         return self.pressure
@@ -237,8 +551,9 @@ class Sensors:
         self.scan_pressure_sensor()
         return self.read_pressure_sensor()
 
+    @guarded("gas", "redux")
     def scan_reducing_sensor(self):
-        self.redux.value = round(self.gas_sensor().reducing, 0)
+        self.redux.value = round(self.gas_sensor.read().reducing, 0)
         self.redux.timestamp = self.ts()
 
     def read_reducing_sensor(self):
@@ -248,8 +563,9 @@ class Sensors:
         self.scan_reducing_sensor()
         return self.read_reducing_sensor()
 
+    @guarded("gas", "oxi")
     def scan_oxidising_sensor(self):
-        self.oxi.value = round(self.gas_sensor().oxidising, 0)
+        self.oxi.value = round(self.gas_sensor.read().oxidising, 0)
         self.oxi.timestamp = self.ts()
 
     def read_oxidising_sensor(self):
@@ -259,8 +575,9 @@ class Sensors:
         self.scan_oxidising_sensor()
         return self.read_oxidising_sensor()
 
+    @guarded("gas", "nh3")
     def scan_nh3_sensor(self):
-        self.nh3.value = round(self.gas_sensor().nh3, 0)
+        self.nh3.value = round(self.gas_sensor.read().nh3, 0)
         self.nh3.timestamp = self.ts()
 
     def read_nh3_sensor(self):
@@ -270,8 +587,9 @@ class Sensors:
         self.scan_nh3_sensor()
         return self.read_nh3_sensor()
 
+    @guarded("gas", "redux", "oxi", "nh3")
     def scan_gas_sensor(self):
-        gas_data = self.gas_sensor.read_all()
+        gas_data = self.gas_sensor.read()
         ts = self.ts()
         self.redux.value = round(gas_data.reducing, 0)
         self.oxi.value = round(gas_data.oxidising, 0)
@@ -281,35 +599,40 @@ class Sensors:
         self.nh3.timestamp = ts
 
     def read_gas_sensor(self):
-        return self.raw_red_rs, self.raw_oxi_rs, self.raw_nh3_rs
+        return self.redux, self.oxi, self.nh3
 
     def observe_gas_sensor(self):
         self.scan_gas_sensor()
         return self.read_gas_sensor()
 
+    @guarded("pms5003", "pm1", "pm2_5", "pm10")
     def scan_particle_sensor(self):
-        if self.enable_particle_sensor:
-            try:
-                pm_values = self.pms5003.read()
+        if self.config.enable_particle_sensor:
+            if self.pms_reader is not None:
+                # the reader thread has already read it, no fresh frame is a failed read
+                latest = self.pms_reader.latest()
+                if latest is None:
+                    raise self.pms_errors[0](
+                        f"no PMS5003 frame in the last {self.pms_reader.max_age}s"
+                    )
+                ts, pm_values = latest
+            else:
+                try:
+                    pm_values = self.pms5003.read()
+                except self.pms_errors:
+                    # reset for the next read, rather than blocking on a second one now,
+                    # and let the breaker decide when that is
+                    self.pms5003.reset()
+                    self.metrics.device("pms5003").retry()
+                    raise
                 ts = self.ts()
-                self.pm1.value = pm_values.pm_ug_per_m3(1)
-                self.pm2_5.value = pm_values.pm_ug_per_m3(2.5)
-                self.pm10.value = pm_values.pm_ug_per_m3(10)
-                self.pm1.timestamp = ts
-                self.pm2_5.timestamp = ts
-                self.pm10.timestamp = ts
-            except (ReadTimeoutError, ChecksumMismatchError):
-                # logging.info("Failed to read PMS5003")
-                # display_error("Particle Sensor Error")
-                self.pms5003.reset()
-                pm_values = self.pms5003.read()
-                ts = self.ts
-                self.pm1.value = pm_values.pm_ug_per_m3(1)
-                self.pm2_5.value = pm_values.pm_ug_per_m3(2.5)
-                self.pm10.value = pm_values.pm_ug_per_m3(10)
-                self.pm1.timestamp = ts
-                self.pm2_5.timestamp = ts
-                self.pm10.timestamp = ts
+            for reading, size in (
+                (self.pm1, 1),
+                (self.pm2_5, 2.5),
+                (self.pm10, 10),
+            ):
+                reading.value = pm_values.pm_ug_per_m3(size)
+                reading.timestamp = ts
 
     def read_particle_sensor(self):
         return self.pm1, self.pm2_5, self.pm10
@@ -318,9 +641,10 @@ class Sensors:
         self.scan_particle_sensor()
         return self.read_particle_sensor()
 
+    @guarded("sgp30", "co2", "voc")
     def scan_eco2_tvoc_sensor(self):
         self.co2.value, self.voc.value = self.sgp30.command("measure_air_quality")
-        ts = self.ts
+        ts = self.ts()
         self.co2.timestamp = ts
         self.voc.timestamp = ts
 
@@ -0,0 +1,420 @@
+from dataclasses import dataclass, field, replace
+import math
+import random
+import time
+
+from enviroApi.hardware.pms import pack_frame
+
+
+class ReadTimeoutError(RuntimeError):
+    """Simulated pms5003.ReadTimeoutError"""
+
+
+class ChecksumMismatchError(RuntimeError):
+    """Simulated pms5003.ChecksumMismatchError"""
+
+
+@dataclass
+class Signal:
+    """Dataclass to hold the value model of a simulated reading
+    init:
+        mean (float): value the reading centres on
+        amplitude (float): amplitude of a daily (or period long) sine on top of the mean
+        period (float): seconds in one cycle of the sine
+        phase (float): seconds the sine is shifted by
+        noise (float): standard deviation of gaussian noise added to each read
+        drift (float): standard deviation of each step of a random walk added to the mean
+        low (float): smallest value returned
+        high (float): largest value returned
+    Returns:
+        None
+    """
+
+    mean: float
+    amplitude: float = 0.0
+    period: float = 86400.0
+    phase: float = 0.0
+    noise: float = 0.0
+    drift: float = 0.0
+    low: float = -math.inf
+    high: float = math.inf
+    walk: float = field(default=0.0, repr=False)
+
+    def sample(self, t: float, rng: random.Random) -> float:
+        """Returns the value at t seconds since the device started"""
+        if self.drift:
+            self.walk += rng.gauss(0.0, self.drift)
+        value = self.mean + self.walk
+        if self.amplitude:
+            value += self.amplitude * math.sin(
+                2 * math.pi * (t + self.phase) / self.period
+            )
+        if self.noise:
+            value += rng.gauss(0.0, self.noise)
+        return min(max(value, self.low), self.high)
+
+
+@dataclass
+class Faults:
+    """Dataclass to hold the fault rates of a simulated device, probabilities per read
+    init:
+        timeout (float): the read times out, ReadTimeoutError on the PMS5003 and
+            TimeoutError elsewhere
+        checksum (float): a PMS5003 frame fails its checksum
+        error (float): the bus returns an OSError, like an I2C NAK
+    Returns:
+        None
+    """
+
+    timeout: float = 0.0
+    checksum: float = 0.0
+    error: float = 0.0
+
+
+# indoor values in the units the device libraries return, gas resistances in Ohms
+SIGNALS = {
+    "temperature": Signal(21.0, amplitude=2.0, noise=0.05, drift=0.001),
+    "pressure": Signal(1013.0, noise=0.05, drift=0.01),
+    "humidity": Signal(45.0, amplitude=5.0, phase=43200, noise=0.3, low=0, high=100),
+    "light": Signal(300.0, amplitude=300.0, phase=-21600, noise=5.0, low=0),
+    "proximity": Signal(0.0, noise=2.0, low=0),
+    "oxidising": Signal(20000.0, noise=200.0, drift=10.0, low=0),
+    "reducing": Signal(300000.0, noise=3000.0, drift=100.0, low=0),
+    "nh3": Signal(80000.0, noise=800.0, drift=50.0, low=0),
+    "pm1": Signal(4.0, noise=1.0, drift=0.05, low=0),
+    "pm2.5": Signal(7.0, noise=1.5, drift=0.05, low=0),
+    "pm10": Signal(9.0, noise=2.0, drift=0.05, low=0),
+    "co2": Signal(420.0, noise=5.0, drift=0.5, low=400, high=60000),
+    "voc": Signal(20.0, noise=3.0, drift=0.2, low=0, high=60000),
+    "cpu": Signal(50.0, amplitude=3.0, noise=0.3, low=0),
+}
+
+
+class SimDevice:
+    """Base of the simulated devices, samples signals with latency and faults
+
+    init:
+        name (str): name of the device, also seeds its random numbers
+        signals (dict): reading name to Signal
+        seed (int): seed of the random numbers, the same seed gives the same readings
+        latency (float): seconds each read takes
+        faults (Faults): fault rates
+        clock (callable): returns the time in seconds
+        sleep (callable): waits a number of seconds
+    """
+
+    def __init__(
+        self,
+        name: str,
+        signals: dict,
+        seed: int = 0,
+        latency: float = 0.0,
+        faults: Faults = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.name = name
+        self.signals = signals
+        self.latency = latency
+        self.faults = Faults() if faults is None else faults
+        self.clock = clock
+        self.sleep = sleep
+        self.reads = 0
+        self.failures = 0
+        self._rng = random.Random(f"{seed}-{name}")
+        self._start = clock()
+
+    def _read(self, *names: str) -> list:
+        """Waits out the latency, injects faults and returns the named readings"""
+        self.reads += 1
+        if self.latency:
+            self.sleep(self.latency)
+        roll = self._rng.random()
+        if roll < self.faults.timeout:
+            self.failures += 1
+            raise self._timeout(f"{self.name} read timed out")
+        roll -= self.faults.timeout
+        if roll < self.faults.checksum:
+            self.failures += 1
+            raise ChecksumMismatchError(f"{self.name} checksum mismatch")
+        roll -= self.faults.checksum
+        if roll < self.faults.error:
+            self.failures += 1
+            raise OSError(121, f"{self.name} remote I/O error")
+        t = self.clock() - self._start
+        return [self.signals[name].sample(t, self._rng) for name in names]
+
+    def _timeout(self, message: str) -> Exception:
+        return TimeoutError(message)
+
+
+class SimBME280(SimDevice):
+    def get_temperature(self) -> float:
+        return self._read("temperature")[0]
+
+    def get_pressure(self) -> float:
+        return self._read("pressure")[0]
+
+    def get_humidity(self) -> float:
+        return self._read("humidity")[0]
+
+
+class SimLTR559(SimDevice):
+    def get_lux(self) -> float:
+        return self._read("light")[0]
+
+    def get_proximity(self) -> float:
+        return self._read("proximity")[0]
+
+
+class SimPMS5003Data:
+    """Simulated pms5003.PMS5003Data"""
+
+    def __init__(self, pm1: float, pm25: float, pm10: float):
+        self._pm = {1.0: pm1, 2.5: pm25, 10: pm10}
+
+    def pm_ug_per_m3(self, size: float, atmospheric_environment: bool = False) -> float:
+        if size not in self._pm:
+            raise ValueError("Particle size {} measurement not available.".format(size))
+        return self._pm[size]
+
+
+class SimPMS5003(SimDevice):
+    def read(self) -> SimPMS5003Data:
+        pm1, pm25, pm10 = self._read("pm1", "pm2.5", "pm10")
+        # the PMS5003 reports whole ug/m3, and the larger sizes include the smaller
+        pm1 = round(pm1)
+        pm25 = max(round(pm25), pm1)
+        return SimPMS5003Data(pm1, pm25, max(round(pm10), pm25))
+
+    def reset(self) -> None:
+        pass
+
+    def _timeout(self, message: str) -> Exception:
+        return ReadTimeoutError(message)
+
+
+class SimSerial:
+    """Simulated UART of a SimPMS5003, streams its frames as bytes
+
+    init:
+        device (SimPMS5003): sensor whose readings and faults are streamed
+        interval (float): seconds between frames. Defaults to 1.0.
+    Details:
+        read waits for the next frame, like a serial port with a timeout. A timeout
+        fault returns no bytes, a checksum fault flips a bit of the frame and an error
+        fault loses a byte of it, leaving the stream out of step with the frames.
+    """
+
+    def __init__(self, device: SimPMS5003, interval: float = 1.0):
+        self.device = device
+        self.interval = interval
+        self._next = device.clock()
+        self._last = SimPMS5003Data(0, 0, 0)
+
+    def read(self, size: int = 1) -> bytes:
+        wait = self._next - self.device.clock()
+        if wait > 0:
+            self.device.sleep(wait)
+        self._next += self.interval
+        fault = None
+        try:
+            self._last = self.device.read()
+        except ReadTimeoutError:
+            return b""
+        except (ChecksumMismatchError, OSError) as error:
+            # the fault cost the reading, stream the last one damaged
+            fault = error
+        pm = tuple(self._last.pm_ug_per_m3(size) for size in (1.0, 2.5, 10))
+        frame = bytearray(pack_frame(pm + pm + (0,) * 7))
+        if isinstance(fault, ChecksumMismatchError):
+            frame[7] ^= 0x01
+        elif fault is not None:
+            del frame[9]
+        return bytes(frame)
+
+
+class SimSGP30(SimDevice):
+    def start_measurement(self, run_while_waiting=None) -> None:
+        pass
+
+    def command(self, command_name: str, parameters: list = None) -> list:
+        if command_name == "measure_air_quality":
+            return [round(value) for value in self._read("co2", "voc")]
+        return []
+
+
+class SimGasData:
+    """Simulated enviroplus.gas.Mics6814Reading, resistances in Ohms"""
+
+    def __init__(self, oxidising: float, reducing: float, nh3: float):
+        self.oxidising = oxidising
+        self.reducing = reducing
+        self.nh3 = nh3
+        self.adc = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Oxidising: {self.oxidising:05.02f} Ohms\n"
+            f"Reducing: {self.reducing:05.02f} Ohms\n"
+            f"NH3: {self.nh3:05.02f} Ohms"
+        )
+
+
+class SimGas(SimDevice):
+    """Simulated enviroplus.gas module"""
+
+    def read_all(self) -> SimGasData:
+        return SimGasData(*self._read("oxidising", "reducing", "nh3"))
+
+    def read_oxidising(self) -> float:
+        return self.read_all().oxidising
+
+    def read_reducing(self) -> float:
+        return self.read_all().reducing
+
+    def read_nh3(self) -> float:
+        return self.read_all().nh3
+
+
+class SimCpuThermal(SimDevice):
+    """Simulated CpuThermal"""
+
+    def read(self) -> float:
+        return self._read("cpu")[0]
+
+    def close(self) -> None:
+        pass
+
+
+class SimST7735:
+    """Simulated st7735.ST7735, keeps the last frame displayed
+
+    init:
+        width (int): width in pixels after rotation. Defaults to 160.
+        height (int): height in pixels after rotation. Defaults to 80.
+        latency (float): seconds each frame takes to push over SPI. Defaults to 0.0.
+        sleep (callable): waits a number of seconds. Defaults to time.sleep.
+        **kwargs: the ST7735 arguments (port, cs, dc, rotation...), ignored
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        height: int = 80,
+        latency: float = 0.0,
+        sleep=time.sleep,
+        **kwargs,
+    ):
+        self.width = width
+        self.height = height
+        self.latency = latency
+        self.sleep = sleep
+        self.frame = None
+        self.frames = 0
+        self.backlight = True
+
+    def begin(self) -> None:
+        pass
+
+    def set_backlight(self, value) -> None:
+        self.backlight = bool(value)
+
+    def display(self, image) -> None:
+        if self.latency:
+            self.sleep(self.latency)
+        self.frame = image.copy() if hasattr(image, "copy") else image
+        self.frames += 1
+
+
+class SimBackend:
+    """Simulated Enviro+ devices, deterministic for a given seed
+
+    init:
+        seed (int): seed of the random numbers. Defaults to 0.
+        signals (dict, optional): reading name to Signal, overriding SIGNALS. Defaults to None.
+        latency (dict, optional): device name to seconds per read, e.g. {"pms5003": 1.0}.
+            Defaults to None (no latency).
+        faults (dict, optional): device name to Faults, e.g. {"pms5003": Faults(timeout=0.05)}.
+            Defaults to None (no faults).
+        clock (callable): returns the time in seconds, drives the signals. Defaults to time.monotonic.
+        sleep (callable): waits out the latency. Defaults to time.sleep.
+        epoch (float, optional): seconds since the epoch that clock() == 0 stands for.
+            Defaults to None (now, less the clock's current reading).
+    Details:
+        Devices are named bme280, ltr559, pms5003, sgp30, gas, cpu and display. Each one
+        has the methods Sensors and Display call on the real device, raises the same
+        kinds of errors, and gets its own copies of the signals so two backends with the
+        same seed produce the same readings. Pass a fake clock and a no-op sleep to run
+        a day of readings in a second. time_ns follows the clock too, so readings are
+        stamped, and the circuit breakers back off, in simulated time.
+    """
+
+    name = "sim"
+    pms_errors = (ReadTimeoutError, ChecksumMismatchError)
+    # reads return at once, a PMSReader thread would spin unless there is latency
+    pms_reader = False
+
+    def __init__(
+        self,
+        seed: int = 0,
+        signals: dict = None,
+        latency: dict = None,
+        faults: dict = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        epoch: float = None,
+    ):
+        self.seed = seed
+        self.signals = {**SIGNALS, **(signals or {})}
+        self.latency = latency or {}
+        self.faults = faults or {}
+        self.clock = clock
+        self.sleep = sleep
+        self.devices = {}
+        self._epoch_ns = (
+            time.time_ns() - int(clock() * 1e9) if epoch is None else int(epoch * 1e9)
+        )
+
+    def time_ns(self) -> int:
+        return self._epoch_ns + int(self.clock() * 1e9)
+
+    def _device(self, kind, name: str, *readings: str) -> SimDevice:
+        device = kind(
+            name,
+            {reading: replace(self.signals[reading]) for reading in readings},
+            seed=self.seed,
+            latency=self.latency.get(name, 0.0),
+            faults=self.faults.get(name),
+            clock=self.clock,
+            sleep=self.sleep,
+        )
+        self.devices[name] = device
+        return device
+
+    def bme280(self) -> SimBME280:
+        return self._device(SimBME280, "bme280", "temperature", "pressure", "humidity")
+
+    def ltr559(self) -> SimLTR559:
+        return self._device(SimLTR559, "ltr559", "light", "proximity")
+
+    def pms5003(self) -> SimPMS5003:
+        return self._device(SimPMS5003, "pms5003", "pm1", "pm2.5", "pm10")
+
+    def pms5003_port(self, device: SimPMS5003) -> SimSerial:
+        return SimSerial(device)
+
+    def sgp30(self) -> SimSGP30:
+        return self._device(SimSGP30, "sgp30", "co2", "voc")
+
+    def gas(self) -> SimGas:
+        return self._device(SimGas, "gas", "oxidising", "reducing", "nh3")
+
+    def cpu_thermal(self, path: str = None) -> SimCpuThermal:
+        return self._device(SimCpuThermal, "cpu", "cpu")
+
+    def display(self, **kwargs) -> SimST7735:
+        self.devices["display"] = SimST7735(
+            latency=self.latency.get("display", 0.0), sleep=self.sleep, **kwargs
+        )
+        return self.devices["display"]
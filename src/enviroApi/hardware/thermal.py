@@ -0,0 +1,60 @@
+import glob
+import os
+
+THERMAL_ROOT = "/sys/class/thermal"
+
+
+def find_thermal_zone(root: str = THERMAL_ROOT) -> str:
+    """Returns the temp file of the cpu's thermal zone
+
+    Args:
+        root (str, optional): sysfs thermal directory. Defaults to THERMAL_ROOT.
+
+    Details:
+        The Raspberry Pi names its zone cpu-thermal, other boards x86_pkg_temp or
+        similar, so the first zone whose type mentions cpu or pkg wins, then zone 0.
+    """
+    zones = sorted(glob.glob(os.path.join(root, "thermal_zone*")))
+    for zone in zones:
+        try:
+            with open(os.path.join(zone, "type")) as file:
+                kind = file.read().strip().lower()
+        except OSError:
+            continue
+        if "cpu" in kind or "pkg" in kind:
+            return os.path.join(zone, "temp")
+    if zones:
+        return os.path.join(zones[0], "temp")
+    raise FileNotFoundError(f"no thermal zone under {root}")
+
+
+class CpuThermal:
+    """Cpu temperature read from a sysfs thermal zone, without forking vcgencmd
+
+    init:
+        path (str, optional): file holding the temperature in millidegrees C, e.g. a
+            fake file in tests. Defaults to None (find_thermal_zone).
+    Details:
+        The file is opened once and reread with os.pread at offset 0, which makes
+        sysfs render the current value again, so a reading is one system call
+        instead of a process spawn and a parse of its output.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = find_thermal_zone() if path is None else path
+        self._fd = os.open(self.path, os.O_RDONLY)
+
+    def read(self) -> float:
+        """Returns the temperature in degrees C"""
+        return int(os.pread(self._fd, 16, 0)) / 1000
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,3 @@
+from stubs import use_config_stub
+
+use_config_stub()
@@ -0,0 +1,68 @@
+"""Stand-in for enviroApi.config while it does not import, shared by tests and benchmarks"""
+import importlib
+import sys
+import types
+
+
+class Variable_Units:
+    variables = [
+        "light",
+        "temperature",
+        "pressure",
+        "humidity",
+        "oxi",
+        "redux",
+        "nh3",
+        "pm1",
+        "pm2.5",
+        "pm10",
+        "noise",
+        "c02",
+        "voc",
+    ]
+    units = [
+        "Lux",
+        "C",
+        "hPa",
+        "%",
+        "kOhms",
+        "kOhms",
+        "kOhms",
+        "ug/m3",
+        "ug/m3",
+        "ug/m3",
+        "dBa",
+        "kOhms",
+        "kOhms",
+    ]
+    Dict = dict(zip(variables, units))
+    light, temperature, pressure, humidity = variables[:4]
+    light_unit, temperature_unit, pressure_unit, humidity_unit = units[:4]
+    oxidising, reducing, nh3, pm1, pm25, pm10, noise, co2, voc = variables[4:]
+    (
+        oxidising_unit,
+        reducing_unit,
+        nh3_unit,
+        pm1_unit,
+        pm25_unit,
+        pm10_unit,
+        noise_unit,
+        co2_unit,
+        voc_unit,
+    ) = units[4:]
+
+
+class Config:
+    pass
+
+
+def use_config_stub() -> None:
+    """Puts the stand-in in place of enviroApi.config if the real one does not import"""
+    try:
+        importlib.import_module("enviroApi.config")
+    except SyntaxError:
+        config = types.ModuleType("enviroApi.config")
+        config.Variable_Units = Variable_Units
+        config.Config = Config
+        sys.modules["enviroApi.config"] = config
+        importlib.import_module("enviroApi").config = config
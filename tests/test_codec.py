@@ -0,0 +1,59 @@
+import numpy as np
+
+from enviroApi.data.codec import (
+    GorillaReader,
+    GorillaWriter,
+    decode_timestamps,
+    decode_values,
+    encode_timestamps,
+    encode_values,
+)
+
+START = 1_700_000_000_000_000_000
+
+
+def series(rows: int, seed: int = 0) -> tuple:
+    """1 Hz ticks with ms jitter, a drifting temperature and a column with NaN gaps"""
+    rng = np.random.default_rng(seed)
+    timestamps = START + np.arange(rows, dtype=np.int64) * 1_000_000_000
+    timestamps += rng.integers(-1_000_000, 1_000_000, rows)
+    temperature = np.round(20 + np.cumsum(rng.normal(0, 0.01, rows)), 2)
+    pm25 = rng.integers(0, 40, rows).astype(float)
+    pm25[rng.random(rows) < 0.1] = np.nan
+    return timestamps, np.vstack([temperature, pm25])
+
+
+def test_timestamps_round_trip():
+    timestamps, _ = series(5000)
+    # a long pause and a step back in time still decode exactly
+    timestamps[2000:] += 3600 * 1_000_000_000
+    timestamps[3000] -= 5_000_000_000
+    decoded = decode_timestamps(encode_timestamps(timestamps), len(timestamps))
+    assert np.array_equal(decoded, timestamps)
+
+
+def test_values_round_trip_bit_exact():
+    _, values = series(5000)
+    for column in values:
+        decoded = decode_values(encode_values(column), len(column))
+        assert np.array_equal(decoded.view(np.int64), column.view(np.int64))
+
+
+def test_archive_reads_ranges_across_blocks(tmp_path):
+    path = tmp_path / "history.gor"
+    timestamps, values = series(10000)
+    with GorillaWriter(path, ["temperature", "pm2.5"]) as writer:
+        for block in range(0, 10000, 3600):
+            writer.write_block(
+                timestamps[block : block + 3600], values[:, block : block + 3600]
+            )
+    with GorillaReader(path) as reader:
+        assert len(reader) == 10000
+        assert len(reader.blocks) == 3
+        got_timestamps, got_values = reader.read("pm2.5")
+        assert np.array_equal(got_timestamps, timestamps)
+        assert np.array_equal(got_values, values[1], equal_nan=True)
+        start, end = timestamps[3000], timestamps[7999]
+        got_timestamps, got_values = reader.read("temperature", start, end)
+        assert np.array_equal(got_timestamps, timestamps[3000:8000])
+        assert np.array_equal(got_values, values[0, 3000:8000])
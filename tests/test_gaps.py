@@ -0,0 +1,50 @@
+from enviroApi.data.gaps import GapIndex
+
+S = 1_000_000_000
+
+
+def index() -> GapIndex:
+    """Readings every second from 0 to 100s, silent from 100s to 300s, marked down at
+    400s until a reading at 450s, then every second to 500s"""
+    gaps = GapIndex(max_interval=60)
+    for t in range(0, 101):
+        gaps.observe(t * S)
+    for t in range(300, 401):
+        gaps.observe(t * S)
+    gaps.mark_down(401 * S)
+    for t in range(450, 501):
+        gaps.observe(t * S)
+    return gaps
+
+
+def test_outages_from_silence_and_failures():
+    gaps = index()
+    assert gaps.gaps() == [(100 * S, 300 * S), (400 * S, 450 * S)]
+    assert gaps.gaps(200 * S, 420 * S) == [(200 * S, 300 * S), (400 * S, 420 * S)]
+    assert gaps.containing(150 * S) == (100 * S, 300 * S)
+    assert gaps.containing(350 * S) is None
+
+
+def test_spans_and_coverage():
+    gaps = index()
+    assert gaps.spans(0, 500 * S) == [
+        (0, 100 * S),
+        (300 * S, 400 * S),
+        (450 * S, 500 * S),
+    ]
+    assert gaps.coverage(0, 500 * S) == 0.5
+
+
+def test_outage_in_progress_runs_to_now():
+    gaps = index()
+    assert gaps.gaps(now=600 * S)[-1] == (500 * S, 600 * S)
+    assert gaps.gaps(now=520 * S)[-1] == (400 * S, 450 * S)
+
+
+def test_max_interval_fits_a_slow_sensor():
+    gaps = GapIndex(max_interval=60)
+    gaps.max_interval = 2 * 150
+    for t in range(0, 1500, 150):
+        gaps.observe(t * S)
+    assert gaps.gaps() == []
+    assert gaps.coverage(0, 1350 * S) == 1.0
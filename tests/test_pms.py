@@ -0,0 +1,36 @@
+from enviroApi.hardware.pms import FrameParser, pack_frame
+
+
+def frame(i: int) -> bytes:
+    return pack_frame((i, i + 1, i + 2) * 2 + (0,) * 7)
+
+
+def feed(parser: FrameParser, stream: bytes, chunk: int = 7) -> list:
+    frames = []
+    for i in range(0, len(stream), chunk):
+        frames += parser.feed(stream[i : i + chunk])
+    return frames
+
+
+def test_frames_split_across_reads():
+    parser = FrameParser()
+    frames = feed(parser, b"".join(frame(i) for i in range(10)))
+    assert [f.pm_ug_per_m3(2.5) for f in frames] == [i + 1 for i in range(10)]
+    assert parser.bad_checksums == 0 and parser.skipped == 0
+
+
+def test_resyncs_after_noise_and_bad_checksum():
+    corrupt = bytearray(frame(1))
+    corrupt[10] ^= 0x10
+    stream = b"\x00\x42\x17" + frame(0) + bytes(corrupt) + frame(2)
+    parser = FrameParser()
+    frames = feed(parser, stream)
+    assert [f.pm_ug_per_m3(1.0) for f in frames] == [0, 2]
+    assert parser.bad_checksums >= 1
+
+
+def test_lost_byte_costs_only_its_frame():
+    short = frame(1)[:20] + frame(1)[21:]
+    parser = FrameParser()
+    frames = feed(parser, frame(0) + short + frame(2) + frame(3))
+    assert [f.pm_ug_per_m3(1.0) for f in frames] == [0, 2, 3]
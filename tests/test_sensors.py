@@ -0,0 +1,68 @@
+import logging
+import tracemalloc
+import types
+
+from enviroApi.data import SensorData, Values
+from enviroApi.hardware.sensors import Sensors
+from enviroApi.hardware.simulated import SimBackend
+
+CONFIG = types.SimpleNamespace(
+    enable_particle_sensor=True,
+    enable_eco2_tvoc=True,
+    enable_oxi_redux_nh3=True,
+    enable_proxy_sensory=True,
+    enable_noise=False,
+)
+
+
+def make_sensors() -> Sensors:
+    return Sensors(
+        CONFIG,
+        logging.getLogger(__name__),
+        SensorData=SensorData(),
+        backend=SimBackend(seed=1),
+    )
+
+
+def test_scans_do_not_allocate():
+    sensors = make_sensors()
+    scans = (
+        sensors.scan_temperature_sensor,
+        sensors.scan_gas_sensor,
+        sensors.scan_particle_sensor,
+    )
+    # fill the free lists, caches and histogram buckets first
+    for _ in range(1000):
+        for scan in scans:
+            scan()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(1000):
+            for scan in scans:
+                scan()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        sensors.close()
+    only_package = [tracemalloc.Filter(True, "*enviroApi*")]
+    grown = [
+        stat
+        for stat in after.filter_traces(only_package).compare_to(
+            before.filter_traces(only_package), "lineno"
+        )
+        if stat.size_diff > 0
+    ]
+    # nothing held on to per scan, 3000 scans would show as kilobytes
+    assert sum(stat.size_diff for stat in grown) < 1024, grown
+
+
+def test_readings_keep_units_after_set_attributes():
+    data = SensorData()
+    data.set_attributes()
+    unit = data.var_units.temperature_unit
+    data.add_row([Values(21.5, 1, unit, "temperature")], 1)
+    data.add_data("pressure", 1013.0, 2)
+    assert data.get_data("temperature") == Values(21.5, 1, unit, "temperature")
+    assert data.get_data("pressure").unit == data.var_units.Dict["pressure"]
+    assert data.get_data("pressure").name == "pressure"